@@ -67,11 +67,13 @@ fi
 case $TEST_TYPE in
     unit)
         echo "Running unit tests only..."
-        PYTEST_CMD="$PYTEST_CMD -m 'not integration'"
+        # loadgroup keeps each xdist_group (e.g. the notifier tests) on one worker
+        PYTEST_CMD="$PYTEST_CMD -m 'not integration' -n auto --dist=loadgroup"
         ;;
     integration)
         echo "Running integration tests..."
-        PYTEST_CMD="$PYTEST_CMD -m integration"
+        # loadscope keeps tests sharing the session browser on one worker
+        PYTEST_CMD="$PYTEST_CMD -m integration -n auto --dist=loadscope"
         ;;
     all)
         echo "Running all tests..."
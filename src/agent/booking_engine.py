@@ -29,6 +29,14 @@ logger = setup_logger(__name__)
 # Type alias for status callbacks
 StatusCallback = Callable[[str, str, Optional[str]], Awaitable[None]]
 
+# Last-resort service button: a long label mentioning DL/license/permit that is not "Previous"
+_FALLBACK_SERVICE_RE = re.compile(r"^(?=.{11})(?!.*previous).*(dl|license|permit)", re.I | re.S)
+
+
+def _keyword_pattern(keywords: List[str]) -> re.Pattern:
+    """Case-insensitive pattern matching any of the keywords as a substring."""
+    return re.compile("|".join(re.escape(kw) for kw in keywords), re.I)
+
 
 class BookingEngine:
     """
@@ -595,36 +603,28 @@ class BookingEngine:
                     continue
 
             if not service_clicked:
-                buttons = await page.query_selector_all("button") # type: ignore
-                for btn in buttons:
+                btn = page.locator("button", has_text=_keyword_pattern(button_keywords)).first
+                if await btn.count() > 0:
                     text = (await btn.text_content() or "").lower()
-                    if any(kw in text for kw in button_keywords):
-                        await btn.click()
-                        await self._dismiss_blocking_dialogs(page)
-                        if await self._is_on_customer_details_step(page):
-                            await self._emit("success", "Selected service and moved to Customer Details")
-                            return True
-                        await self._emit("success", f"Selected service: {text.strip()}")
-                        service_clicked = True
-                        break
+                    await btn.click()
+                    await self._dismiss_blocking_dialogs(page)
+                    if await self._is_on_customer_details_step(page):
+                        await self._emit("success", "Selected service and moved to Customer Details")
+                        return True
+                    await self._emit("success", f"Selected service: {text.strip()}")
+                    service_clicked = True
 
             if not service_clicked:
-                buttons = await page.query_selector_all("button") # type: ignore
-                for btn in buttons:
+                btn = page.locator("button", has_text=_FALLBACK_SERVICE_RE).first
+                if await btn.count() > 0:
                     text = (await btn.text_content() or "").lower()
-                    if (
-                        len(text) > 10
-                        and "previous" not in text
-                        and ("dl" in text or "license" in text or "permit" in text)
-                    ):
-                        await btn.click()
-                        await self._dismiss_blocking_dialogs(page)
-                        if await self._is_on_customer_details_step(page):
-                            await self._emit("success", "Selected service and moved to Customer Details")
-                            return True
-                        await self._emit("warning", f"Fallback service selection: {text.strip()}")
-                        service_clicked = True
-                        break
+                    await btn.click()
+                    await self._dismiss_blocking_dialogs(page)
+                    if await self._is_on_customer_details_step(page):
+                        await self._emit("success", "Selected service and moved to Customer Details")
+                        return True
+                    await self._emit("warning", f"Fallback service selection: {text.strip()}")
+                    service_clicked = True
 
             if not service_clicked:
                 # Some flows land on an intermediate step with only Previous/Next.
@@ -639,14 +639,12 @@ class BookingEngine:
                             return True
                         if await self._is_on_service_selection_step(page):
                             # Retry one quick service click pass after transition.
-                            buttons = await page.query_selector_all("button") # type: ignore
-                            for btn in buttons:
+                            btn = page.locator("button", has_text=_keyword_pattern(button_keywords)).first
+                            if await btn.count() > 0:
                                 text = (await btn.text_content() or "").lower()
-                                if any(kw in text for kw in button_keywords):
-                                    await btn.click()
-                                    await self._emit("success", f"Selected service: {text.strip()}")
-                                    service_clicked = True
-                                    break
+                                await btn.click()
+                                await self._emit("success", f"Selected service: {text.strip()}")
+                                service_clicked = True
 
             if not service_clicked:
                 if await self._is_on_customer_details_step(page):
@@ -1450,21 +1448,22 @@ class BookingEngine:
         page = self.page
         if not page:
             return False
-        buttons = await page.query_selector_all("button") # type: ignore
-        for btn in buttons:
-            text = (await btn.text_content() or "").lower().strip()
-            if any(kw in text for kw in keywords):
+        # The text match runs in the browser; only matching buttons come back
+        matches = page.locator("button", has_text=_keyword_pattern(keywords))
+        for idx in range(await matches.count()):
+            btn = matches.nth(idx)
+            try:
+                text = (await btn.text_content() or "").lower().strip()
+                name = self._sanitize_name(text or "button")
+                await self._capture_step(f"click_before_{name}")
+                await self._emit("info", f"Clicking button: {text[:80]}")
                 try:
-                    name = self._sanitize_name(text or "button")
-                    await self._capture_step(f"click_before_{name}")
-                    await self._emit("info", f"Clicking button: {text[:80]}")
-                    try:
-                        await page.evaluate("el => el.click()", btn) # type: ignore
-                    except:
-                        await btn.click(force=True, timeout=5000) # type: ignore
-                    await self._capture_step(f"click_after_{name}")
-                    await self._emit("info", f"Clicked button: {text[:80]}")
-                    return True
+                    await btn.evaluate("el => el.click()")
                 except:
-                    continue
+                    await btn.click(force=True, timeout=5000)
+                await self._capture_step(f"click_after_{name}")
+                await self._emit("info", f"Clicked button: {text[:80]}")
+                return True
+            except:
+                continue
         return False
\ No newline at end of file
@@ -13,6 +13,8 @@ from apscheduler.triggers.interval import IntervalTrigger  # type: ignore
 from agent.booking_engine import BookingEngine  # type: ignore
 from agent.decision_engine import DecisionEngine  # type: ignore
 from db.database import Database  # type: ignore
+from models.models import BookingJob, JobStatus  # type: ignore
+from utils.notifier import EmailNotifier  # type: ignore
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +34,10 @@ class AgentScheduler:
         self.decision_engine = DecisionEngine()
         self.scheduler = AsyncIOScheduler()
         self._active_engines: Dict[str, BookingEngine] = {}
+        # One notifier per SMTP account/recipient so its SMTP session is reused across checks
+        self._notifiers: Dict[tuple, EmailNotifier] = {}
+        # Notifier key of each job that has sent a notification and is still running
+        self._notifier_keys: Dict[str, tuple] = {}
 
     def start(self):
         """Start the scheduler."""
@@ -39,11 +45,15 @@ class AgentScheduler:
             self.scheduler.start()
             logger.info("Agent scheduler started")
 
-    def stop(self):
-        """Shutdown the scheduler."""
+    async def stop(self):
+        """Shutdown the scheduler and close the notifiers' SMTP sessions."""
         if self.scheduler.running:
             self.scheduler.shutdown(wait=False)
             logger.info("Agent scheduler stopped")
+        notifiers = list(self._notifiers.values())
+        self._notifiers.clear()
+        self._notifier_keys.clear()
+        await asyncio.gather(*(notifier.aclose() for notifier in notifiers), return_exceptions=True)
 
     async def start_job(self, job_id: str) -> bool:
         """
@@ -103,6 +113,7 @@ class AgentScheduler:
         engine = self._active_engines.pop(job_id, None)
         if engine:
             await engine.cleanup()
+        await self._release_notifier(job_id)
 
         await self.db.update_job(job_id, {"status": "stopped"})
         await self._log(job_id, "info", "Job stopped by user")
@@ -112,17 +123,19 @@ class AgentScheduler:
     async def _run_check(self, job_id: str, config: Dict,
                           button_keywords: list, auto_book: bool):
         """Execute a single check cycle for a job."""
-        job = await self.db.get_job(job_id)
-        if not job or job["status"] in ("stopped", "booked", "failed"):
+        row = await self.db.get_job(job_id)
+        job = BookingJob.from_row(row) if row else None
+        if not job or job.status in (JobStatus.STOPPED, JobStatus.BOOKED, JobStatus.FAILED):
             try:
                 self.scheduler.remove_job(f"check_{job_id}")
             except:
                 pass
+            await self._release_notifier(job_id)
             return
 
         # Check attempt limit
-        attempts = job.get("attempts", 0)
-        max_attempts = job.get("max_attempts", 100)
+        attempts = job.attempts
+        max_attempts = job.max_attempts
         if attempts >= max_attempts:
             await self.db.update_job(job_id, {"status": "failed"})
             await self._log(job_id, "error",
@@ -132,6 +145,7 @@ class AgentScheduler:
                 self.scheduler.remove_job(f"check_{job_id}")
             except:
                 pass
+            await self._release_notifier(job_id)
             return
 
         # Increment attempt counter
@@ -201,12 +215,14 @@ class AgentScheduler:
 
                 # Send email notification
                 try:
-                    from utils.notifier import EmailNotifier  # type: ignore
-                    notifier = EmailNotifier(config)
+                    notifier = self._get_notifier(job_id, config)
                     subject = f"{'BOOKED' if confirmed else 'Found'}: DPS Appointment {result.get('next_available', '')}"
                     await notifier.send_notification(subject=subject, appointments=result)
                 except Exception as e:
                     await self._log(job_id, "warning", f"Email notification failed: {e}")
+
+                if confirmed:
+                    await self._release_notifier(job_id)
             else:
                 await self._log(job_id, "info", "No appointments available this check")
 
@@ -241,6 +257,25 @@ class AgentScheduler:
             'screenshot_on_error': True,
         }
 
+    def _get_notifier(self, job_id: str, config: Dict) -> EmailNotifier:
+        """Return the shared notifier for this config's SMTP account and recipient."""
+        key = (config.get("smtp_server"), config.get("smtp_port"), config.get("smtp_user"),
+               config.get("smtp_password"), config.get("notify_email"))
+        self._notifier_keys[job_id] = key
+        notifier = self._notifiers.get(key)
+        if notifier is None:
+            notifier = self._notifiers[key] = EmailNotifier(config)
+        return notifier
+
+    async def _release_notifier(self, job_id: str):
+        """Drop a finished job's notifier and close its SMTP sessions unless another job still uses it."""
+        key = self._notifier_keys.pop(job_id, None)
+        if key is None or key in self._notifier_keys.values():
+            return
+        notifier = self._notifiers.pop(key, None)
+        if notifier is not None:
+            await notifier.aclose()
+
     async def _log(self, job_id: str, level: str, message: str, screenshot_path: Optional[str] = None):
         """Write a log entry to the database."""
         try:
@@ -10,6 +10,13 @@ from fastapi.staticfiles import StaticFiles  # type: ignore
 from fastapi.exceptions import RequestValidationError # type: ignore
 from fastapi.responses import JSONResponse # type: ignore
 
+# Serialize responses with orjson when it is installed
+try:
+    import orjson  # type: ignore  # noqa: F401
+    from fastapi.responses import ORJSONResponse as DefaultResponse  # type: ignore
+except ImportError:
+    DefaultResponse = JSONResponse
+
 from api.routes import router, set_dependencies  # type: ignore
 from api.websocket import ConnectionManager  # type: ignore
 from db.database import Database  # type: ignore
@@ -62,6 +69,7 @@ async def lifespan(app: FastAPI):
         logger.warning(f"CRITICAL: Event loop is {type(loop).__name__}, but ProactorEventLoop is required for Playwright on Windows!")
 
     await db.connect()
+    db.start_log_writer()
     logger.info("Database connected")
 
     scheduler = AgentScheduler(db, broadcast=ws_manager.broadcast)
@@ -80,7 +88,7 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("Shutting down DPS Agent Booking System...")
-    scheduler.stop()
+    await scheduler.stop()
     await db.close()
     logger.info("Shutdown complete")
 
@@ -90,6 +98,7 @@ app = FastAPI(
     description="Intelligent, autonomous Texas DPS appointment booking agent",
     version="2.0.0",
     lifespan=lifespan,
+    default_response_class=DefaultResponse,
 )
 
 @app.exception_handler(RequestValidationError)
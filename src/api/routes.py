@@ -3,6 +3,7 @@ API route definitions for the DPS Agent Booking System.
 """
 
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from models.models import (
     UserProfileCreate, UserProfileResponse,
@@ -68,8 +69,9 @@ async def create_user(user: UserProfileCreate):
 async def list_users():
     """List all user profiles."""
     db = get_db()
-    users = await db.get_all_users()
-    return [_user_response(u) for u in users]
+    # Rows are returned as-is: FastAPI validates and filters them against response_model once,
+    # instead of building an intermediate model per row first
+    return await db.get_all_users()
 
 
 @router.get("/users/{user_id}", response_model=UserProfileResponse)
@@ -167,8 +169,8 @@ async def create_job(job: BookingJobCreate):
 async def list_jobs():
     """List all booking jobs."""
     db = get_db()
-    jobs = await db.get_all_jobs()
-    return [_job_response(j) for j in jobs]
+    # Validated once against response_model (see list_users)
+    return await db.get_all_jobs()
 
 
 @router.get("/jobs/{job_id}", response_model=BookingJobResponse)
@@ -203,8 +205,8 @@ async def get_job_logs(job_id: str, limit: int = 50):
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    logs = await db.get_logs(job_id, limit)
-    return [AgentLogResponse(**log) for log in logs]
+    # Validated once against response_model (see list_users)
+    return await db.get_logs(job_id, limit)
 
 
 # ─── Booking History ─────────────────────────────────────────────
@@ -213,8 +215,20 @@ async def get_job_logs(job_id: str, limit: int = 50):
 async def list_bookings():
     """List all booking results."""
     db = get_db()
-    results = await db.get_all_bookings()
-    return [BookingResultResponse(**r) for r in results]
+    # Validated once against response_model (see list_users)
+    return await db.get_all_bookings()
+
+
+@router.get("/bookings/stream")
+async def stream_bookings():
+    """Stream all booking results as NDJSON, one row per line."""
+    db = get_db()
+
+    async def rows():
+        async for r in db.iter_all_bookings():
+            yield BookingResultResponse.model_validate(r).model_dump_json() + "\n"
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
 
 
 # ─── Health Check ────────────────────────────────────────────────
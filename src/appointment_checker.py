@@ -6,11 +6,12 @@ Main checker module for monitoring appointment availability
 import os
 import json
 import asyncio
+import functools
 import re
 from datetime import datetime
-from typing import Optional, Dict, List
+from typing import ClassVar, Optional, Dict, List, Set
 from dotenv import load_dotenv # type: ignore
-from playwright.async_api import async_playwright, Page, Browser, TimeoutError as PlaywrightTimeout # type: ignore
+from playwright.async_api import async_playwright, Page, Browser, BrowserContext, TimeoutError as PlaywrightTimeout # type: ignore
 from utils.notifier import EmailNotifier # type: ignore
 from utils.logger import setup_logger # type: ignore
 from utils.otp_handler import OTPHandler # type: ignore
@@ -20,12 +21,148 @@ load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '..', '.env'))
 
 logger = setup_logger(__name__)
 
+# Chromium launch flags: skip extensions, sync and background services that slow
+# cold start and hold memory between checks
+_CHROMIUM_ARGS = [
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-background-networking',
+    '--disable-sync',
+    '--disable-default-apps',
+    '--disable-translate',
+    '--disable-extensions',
+    '--disable-renderer-backgrounding',
+    '--disable-background-timer-throttling',
+    '--disable-features=TranslateUI,site-per-process,BlinkGenPropertyTrees',
+    '--no-first-run',
+    '--no-zygote',
+]
+
+# Scheduler backend endpoints that return location/availability JSON
+_AVAILABILITY_URL_RE = re.compile(r"/api/.*(AvailableLocation|Location)", re.I)
+
+# Appointment dates as rendered by the scheduler (MM/DD/YYYY) and the text of date cards
+_DATE_RE = re.compile(r"\d{1,2}/\d{1,2}/\d{4}")
+_DATE_TEXT_SELECTOR = r"text=/\d{1,2}\/\d{1,2}\/\d{4}/"
+_DATE_CARD_TEXT_RE = re.compile(r"Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday|\d{1,2}/\d{1,2}/\d{4}", re.I)
+
+# Location names recognised on the slots page, matched in a single pass
+_LOCATION_KEYWORD_RE = re.compile(r"(denton|arlington|dallas|houston|austin|san antonio)", re.I)
+
+# Login form field matchers: (pattern, config key, display name), tested against
+# each text input's accessible name. "Last Name" must not match "Last four of SSN".
+_LOGIN_FIELD_PATTERNS = (
+    (re.compile(r"last\s*(four|4)|ssn", re.I), 'ssn_last4', 'SSN Last 4'),
+    (re.compile(r"first", re.I), 'first_name', 'First Name'),
+    (re.compile(r"last(?!\s*(four|4))", re.I), 'last_name', 'Last Name'),
+    (re.compile(r"date|birth|dob|mm/dd/yyyy", re.I), 'dob', 'Date of Birth'),
+)
+
+# Accessible-name matchers for the buttons clicked during login and booking
+_LOG_ON_BUTTON_RE = re.compile(r"LOG\s*ON", re.I)
+_SUBMIT_BUTTON_RE = re.compile(r"submit|continue|next|ok|accept", re.I)
+_VERIFY_BUTTON_RE = re.compile(r"verify", re.I)
+_NEW_APPOINTMENT_BUTTON_RE = re.compile(r"new\s*appointment", re.I)
+_SERVICE_BUTTON_RE = re.compile(r"apply.*texas", re.I)
+_ANY_DL_SERVICE_BUTTON_RE = re.compile(r"^(?=.{11}).*\bdl\b", re.I)
+
+# Collects every input's attributes, current value and label text in one round trip
+_INPUT_SNAPSHOT_JS = """
+els => els.map(el => ({
+    type: el.getAttribute('type') || '',
+    id: el.id || '',
+    name: el.getAttribute('name') || '',
+    placeholder: el.getAttribute('placeholder') || '',
+    value: el.value || '',
+    labelText: (((el.id && document.querySelector('label[for="' + CSS.escape(el.id) + '"]')) || {}).textContent || '')
+        + ' ' + ((el.closest('label') || {}).textContent || ''),
+}))
+"""
+
+# Known OTP input shapes, most specific first
+_OTP_FIELD_SELECTORS = [
+    "input[type='text'][placeholder*='pass' i]",
+    "input[type='text'][placeholder*='code' i]",
+    "input[id*='otp' i]",
+    "input[id*='passcode' i]",
+    "input[placeholder*='passcode' i]",
+    "input[placeholder*='code' i]",
+]
+
+# Tries the selectors in priority order in one round trip (a comma selector would
+# return whichever match comes first in the document instead)
+_FIRST_MATCH_JS = """
+selectors => {
+    for (const selector of selectors) {
+        const el = document.querySelector(selector);
+        if (el) return el;
+    }
+    return null;
+}
+"""
+
+# Text of every visible matched element, read in one round trip
+_VISIBLE_TEXTS_JS = """
+els => els
+    .filter(el => el.offsetWidth || el.offsetHeight || el.getClientRects().length)
+    .map(el => el.textContent || '')
+"""
+
+# Email fields only appear after the Email contact option is selected
+_EMAIL_FIELD_PATTERNS = (
+    (re.compile(r"verify.*email|email.*verify", re.I), 'email', 'Verify Email'),
+    (re.compile(r"^(?!.*verify).*email", re.I), 'email', 'Email'),
+)
+
+
+def _date_sort_key(date_str: str) -> tuple:
+    """Sort key for an MM/DD/YYYY string matched by _DATE_RE: (year, month, day) as ints"""
+    month, day, year = date_str.split('/')
+    return int(year), int(month), int(day)
+
+
+@functools.lru_cache(maxsize=1)
+def _env_config() -> Dict:
+    """Load configuration from environment variables (parsed once per process)"""
+    return {
+        # Personal Information
+        'first_name': os.getenv('FIRST_NAME', ''),
+        'last_name': os.getenv('LAST_NAME', ''),
+        'dob': os.getenv('DOB', ''),
+        'ssn_last4': os.getenv('SSN_LAST4', ''),
+        'phone': os.getenv('PHONE', ''),
+        'email': os.getenv('EMAIL', ''),
+        'zip_code': os.getenv('ZIP_CODE', '76201'),
+    
+        # Notification Settings
+        'notify_email': os.getenv('NOTIFY_EMAIL', os.getenv('EMAIL', '')),
+        'smtp_server': os.getenv('SMTP_SERVER', 'smtp.gmail.com'),
+        'smtp_port': int(os.getenv('SMTP_PORT', '587')),
+        'smtp_user': os.getenv('SMTP_USER', ''),
+        'smtp_password': os.getenv('SMTP_PASSWORD', ''),
+    
+        # Search Settings
+        'location_preference': os.getenv('LOCATION_PREFERENCE', 'Denton'),
+        'max_distance_miles': int(os.getenv('MAX_DISTANCE_MILES', '20')),
+    
+        # Browser Settings
+        'headless': os.getenv('HEADLESS', 'true').lower() == 'true',
+        'screenshot_on_error': os.getenv('SCREENSHOT_ON_ERROR', 'true').lower() == 'true',
+        'debug_screenshots': os.getenv('DEBUG_SCREENSHOTS', 'false').lower() == 'true',
+    
+        # Repeat checks every N minutes in one browser session (0 = single check)
+        'check_interval_minutes': int(os.getenv('CHECK_INTERVAL_MINUTES', '0')),
+    }
+
 
 class DPSAppointmentChecker:
     """
     Main class for checking DPS appointment availability using Playwright
     """
     
+    # Output directories already created by this process
+    _dirs_created: ClassVar[Set[str]] = set()
+    
     def __init__(self, config: Optional[Dict] = None):
         """
         Initialize the checker with configuration
@@ -33,65 +170,120 @@ class DPSAppointmentChecker:
         Args:
             config: Optional configuration dictionary. If not provided, reads from environment.
         """
-        self.config = config or self._load_config_from_env()
+        self.config = config or dict(_env_config())
         self.base_url = "https://www.txdpsscheduler.com"
         self.notifier = EmailNotifier(self.config)
         self.browser: Optional[Browser] = None
+        self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
+        self._playwright = None
+        self._keep_browser = False
+        self._external_browser = False
+        self._otp_task: Optional[asyncio.Task] = None
+        self._latest_availability = None
+        self._io_tasks: Set[asyncio.Task] = set()
+        self.otp_handler = OTPHandler(
+            email_address=self.config.get('email', ''),
+            smtp_password=self.config.get('smtp_password', '')
+        )
         
-    def _load_config_from_env(self) -> Dict:
-        """Load configuration from environment variables"""
-        return {
-            # Personal Information
-            'first_name': os.getenv('FIRST_NAME', ''),
-            'last_name': os.getenv('LAST_NAME', ''),
-            'dob': os.getenv('DOB', ''),
-            'ssn_last4': os.getenv('SSN_LAST4', ''),
-            'phone': os.getenv('PHONE', ''),
-            'email': os.getenv('EMAIL', ''),
-            'zip_code': os.getenv('ZIP_CODE', '76201'),
-            
-            # Notification Settings
-            'notify_email': os.getenv('NOTIFY_EMAIL', os.getenv('EMAIL', '')),
-            'smtp_server': os.getenv('SMTP_SERVER', 'smtp.gmail.com'),
-            'smtp_port': int(os.getenv('SMTP_PORT', '587')),
-            'smtp_user': os.getenv('SMTP_USER', ''),
-            'smtp_password': os.getenv('SMTP_PASSWORD', ''),
-            
-            # Search Settings
-            'location_preference': os.getenv('LOCATION_PREFERENCE', 'Denton'),
-            'max_distance_miles': int(os.getenv('MAX_DISTANCE_MILES', '20')),
-            
-            # Browser Settings
-            'headless': os.getenv('HEADLESS', 'true').lower() == 'true',
-            'screenshot_on_error': os.getenv('SCREENSHOT_ON_ERROR', 'true').lower() == 'true',
-        }
-    
-    async def setup_browser(self):
-        """Setup Playwright browser instance"""
+    async def setup_browser(self, browser: Optional[Browser] = None, cdp_endpoint: Optional[str] = None):
+        """
+        Setup Playwright browser instance and a fresh context for this check
+        
+        Args:
+            browser: Optional already-launched browser to open the context in. The caller
+                owns it, so cleanup() closes only this checker's context.
+            cdp_endpoint: Optional CDP URL (e.g. http://localhost:9222) of a running Chromium
+                to connect to instead of launching one. cleanup() only disconnects from it.
+        """
         try:
-            playwright = await async_playwright().start()
-            self.browser = await playwright.chromium.launch(
-                headless=self.config['headless'],
-                args=[
-                    '--no-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-gpu',
-                ]
-            )
-            
-            context = await self.browser.new_context( # type: ignore
-                viewport={'width': 1920, 'height': 1080},
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            )
-            
-            self.page = await context.new_page()
+            if browser is not None:
+                self.browser = browser
+                self._external_browser = True
+            
+            if self.browser is None or not self.browser.is_connected():
+                # Open the IMAP connection for the OTP while Chromium starts
+                await asyncio.gather(self._launch_browser(cdp_endpoint), self._connect_otp_handler())
+            else:
+                logger.info("Reusing running browser")
+                await self._connect_otp_handler()
+            
+            await self.reset_context()
             logger.info("Browser setup completed")
             
         except Exception as e:
             logger.error(f"Failed to setup browser: {str(e)}")
             raise
     
+    async def _launch_browser(self, cdp_endpoint: Optional[str] = None):
+        """Start Playwright and launch Chromium, or connect to one over CDP"""
+        # A disconnected browser is replaced by one this checker owns; stop the driver left behind
+        await self._stop_playwright()
+        self._external_browser = False
+        self._playwright = await async_playwright().start()
+        if cdp_endpoint:
+            logger.info(f"Connecting to browser at {cdp_endpoint}")
+            self.browser = await self._playwright.chromium.connect_over_cdp(cdp_endpoint)
+            return
+        self.browser = await self._playwright.chromium.launch(
+            headless=self.config['headless'],
+            args=_CHROMIUM_ARGS,
+            ignore_default_args=['--enable-automation'],
+        )
+    
+    async def _connect_otp_handler(self):
+        """Pre-open the IMAP connection used to read the OTP, when credentials are configured"""
+        if self.config.get('email') and self.config.get('smtp_password'):
+            await self.otp_handler.connect()
+    
+    async def reset_context(self):
+        """Replace the current browser context with a fresh one (clean cookies/storage)"""
+        await self._close_context()
+        self.context = await self.browser.new_context( # type: ignore
+            viewport={'width': 1920, 'height': 1080},
+            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+        )
+        self.page = await self.context.new_page()
+        self._latest_availability = None
+        self.page.on("response", self._on_response)
+    
+    async def _on_response(self, response):
+        """Capture the scheduler's availability JSON as it is fetched by the page"""
+        if not _AVAILABILITY_URL_RE.search(response.url):
+            return
+        try:
+            self._latest_availability = await response.json()
+            logger.info(f"Captured availability response: {response.url}")
+        except Exception as e:
+            logger.debug(f"Could not read availability response: {e}")
+    
+    async def _close_context(self):
+        """Close the current page and context, keeping the browser alive"""
+        if self._io_tasks:
+            await asyncio.gather(*self._io_tasks, return_exceptions=True)
+        if self.page:
+            try:
+                await self.page.close()
+            except Exception as e:
+                logger.debug(f"Error closing page: {e}")
+            self.page = None
+        if self.context:
+            try:
+                await self.context.close()
+            except Exception as e:
+                logger.debug(f"Error closing context: {e}")
+            self.context = None
+    
+    async def __aenter__(self):
+        """Keep one browser alive across several check_appointments() cycles"""
+        self._keep_browser = True
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        self._keep_browser = False
+        await self.cleanup()
+    
     async def navigate_to_scheduler(self) -> bool:
         """Navigate to the appointment scheduler"""
         try:
@@ -109,7 +301,7 @@ class DPSAppointmentChecker:
         except PlaywrightTimeout:
             logger.error("Timeout while navigating to scheduler")
             if self.config['screenshot_on_error']:
-                await self._save_screenshot('navigation_timeout')
+                self._spawn_io(self._save_screenshot('navigation_timeout'))
             return False
         except Exception as e:
             logger.error(f"Error navigating to scheduler: {str(e)}")
@@ -119,12 +311,13 @@ class DPSAppointmentChecker:
         """Fill in the login form with user information"""
         try:
             logger.info("Filling login form")
+            field_values = {key: self.config.get(key, '') for key in ('first_name', 'last_name', 'dob', 'ssn_last4', 'email')}
             
             # First, wait for the page to settle
             await asyncio.sleep(3)
             
             # Save a screenshot to see what we're working with
-            await self._save_screenshot('form_before_fill')
+            self._debug_screenshot('form_before_fill')
             
             # Wait for form to be visible - check for any inputs
             logger.info("Waiting for input fields...")
@@ -137,87 +330,8 @@ class DPSAppointmentChecker:
             # Wait longer to ensure all fields are loaded
             await asyncio.sleep(2)
             
-            inputs = await self.page.query_selector_all("input")
-            logger.info(f"Found {len(inputs)} input fields initially")
-            
-            # Log ALL fields found to understand the form structure
-            for idx, input_field in enumerate(inputs):
-                placeholder = await input_field.get_attribute("placeholder")
-                input_type = await input_field.get_attribute("type")
-                input_id = await input_field.get_attribute("id")
-                
-                # Try to find the label for this field
-                label_text = ""
-                if input_id:
-                    label = await self.page.query_selector(f"label[for='{input_id}']")
-                    if label:
-                        label_text = await label.text_content()
-                
-                logger.info(f"Initial Input {idx}: type={input_type}, label='{label_text}', placeholder='{placeholder}'")
-            
-            filled_count = 0
-            
             # First pass: fill First, Last, DOB, SSN
-            for input_field in inputs:
-                placeholder = await input_field.get_attribute("placeholder") or ""
-                input_id = await input_field.get_attribute("id") or ""
-                input_name = await input_field.get_attribute("name") or ""
-                input_type = await input_field.get_attribute("type") or ""
-                
-                # Skip radio buttons, checkboxes, and other non-form-field inputs
-                if input_type in ["radio", "checkbox", "hidden"]:
-                    continue
-                
-                # Get associated label if exists
-                label_text = ""
-                if input_id:
-                    label = await self.page.query_selector(f"label[for='{input_id}']")
-                    if label:
-                        label_text = await label.text_content()
-                
-                label_lower = label_text.lower()
-                placeholder_lower = placeholder.lower()
-                name_lower = input_name.lower()
-                
-                logger.info(f"Initial field: label='{label_text}', placeholder='{placeholder}'")
-                
-                # Check if field is already filled
-                current_value = await input_field.input_value()
-                if current_value and current_value.strip():
-                    logger.info(f"Field '{label_text}' already filled with: {current_value}")
-                    continue
-                
-                # Determine what to fill based on field matching
-                value_to_fill = None
-                field_name = None
-                
-                # Check for SSN first (before Last Name) since it contains "last"
-                if 'last four' in label_lower or 'last 4' in label_lower or 'ssn' in label_lower:
-                    value_to_fill = self.config.get('ssn_last4', '')
-                    field_name = 'SSN Last 4'
-                elif 'first' in label_lower or 'first' in name_lower:
-                    value_to_fill = self.config.get('first_name', '')
-                    field_name = 'First Name'
-                elif 'last' in label_lower or 'last' in name_lower:
-                    value_to_fill = self.config.get('last_name', '')
-                    field_name = 'Last Name'
-                elif ('date' in label_lower or 'birth' in label_lower or 'dob' in label_lower or 
-                      'mm/dd/yyyy' in placeholder_lower):
-                    value_to_fill = self.config.get('dob', '')
-                    field_name = 'Date of Birth'
-                
-                # Fill the field if we determined a value
-                if value_to_fill:
-                    try:
-                        await input_field.click()
-                        await asyncio.sleep(0.3)
-                        await input_field.fill("")
-                        await asyncio.sleep(0.2)
-                        await input_field.type(value_to_fill, delay=30)
-                        logger.info(f"[OK] Filled {field_name}: {value_to_fill}")
-                        filled_count += 1
-                    except Exception as e:
-                        logger.warning(f"Error filling {field_name}: {e}")
+            filled_count = await self._fill_labeled_fields(_LOGIN_FIELD_PATTERNS, field_values)
             
             logger.info(f"Successfully filled {filled_count} initial fields")
             await asyncio.sleep(1)
@@ -237,20 +351,13 @@ class DPSAppointmentChecker:
                     logger.info(f"Email radio aria-checked: {aria_checked}")
                     
                     if aria_checked == "false":
-                        # Click the radio to show email fields - use JavaScript click
+                        # Click the radio to show email fields, skipping actionability checks
                         try:
-                            # Try using JavaScript click first
-                            await self.page.evaluate("el => el.click()", email_radio) # type: ignore
-                            logger.info("[OK] Clicked Email radio button via JavaScript")
+                            await email_radio.click(force=True, no_wait_after=True, timeout=5000)
+                            logger.info("[OK] Clicked Email radio button")
                             await asyncio.sleep(2)  # Wait for form to update and show email fields
-                        except Exception as js_error:
-                            logger.warning(f"JavaScript click failed: {js_error}, trying Playwright click...")
-                            try:
-                                await email_radio.click(force=True, timeout=5000)
-                                logger.info("[OK] Clicked Email radio button via Playwright")
-                                await asyncio.sleep(2)
-                            except Exception as pw_error:
-                                logger.warning(f"Playwright click also failed: {pw_error}")
+                        except Exception as e:
+                            logger.warning(f"Error clicking Email radio button: {e}")
                     else:
                         logger.info("Email option already selected")
                 else:
@@ -261,131 +368,42 @@ class DPSAppointmentChecker:
             
             # STEP 3: Get fresh set of input fields after Email selection (should now show Email fields)
             logger.info("Step 3: Filling email fields after radio selection...")
-            inputs = await self.page.query_selector_all("input")
-            logger.info(f"Found {len(inputs)} input fields after email selection")
-            
-            # Log all input fields to see what's now available
-            for idx, input_field in enumerate(inputs):
-                placeholder = await input_field.get_attribute("placeholder")
-                input_type = await input_field.get_attribute("type")
-                input_id = await input_field.get_attribute("id")
-                
-                # Try to find the label for this field
-                label_text = ""
-                if input_id:
-                    label = await self.page.query_selector(f"label[for='{input_id}']")
-                    if label:
-                        label_text = await label.text_content()
-                
-                logger.debug(f"Input {idx}: type={input_type}, label='{label_text}', placeholder='{placeholder}'")
-            
             # Second pass: fill Email and Verify Email (these only appear after email radio is selected)
-            for input_field in inputs:
-                placeholder = await input_field.get_attribute("placeholder") or ""
-                input_id = await input_field.get_attribute("id") or ""
-                input_type = await input_field.get_attribute("type") or ""
-                
-                # Skip radio buttons, checkboxes, and other non-form-field inputs
-                if input_type in ["radio", "checkbox", "hidden", "number", "tel"]:
-                    continue
-                
-                # Get associated label if exists
-                label_text = ""
-                if input_id:
-                    label = await self.page.query_selector(f"label[for='{input_id}']")
-                    if label:
-                        label_text = await label.text_content()
-                
-                label_lower = label_text.lower()
-                
-                logger.info(f"Email field check: label='{label_text}'")
-                
-                # Check if field is already filled
-                current_value = await input_field.input_value()
-                if current_value and current_value.strip():
-                    logger.info(f"Field '{label_text}' already filled with: {current_value}")
-                    continue
-                
-                # Only fill email fields here (these appear AFTER email radio is selected)
-                value_to_fill = None
-                field_name = None
-                
-                if 'email' in label_lower and 'verify' not in label_lower:
-                    value_to_fill = self.config.get('email', '')
-                    field_name = 'Email'
-                elif 'verify' in label_lower and 'email' in label_lower:
-                    value_to_fill = self.config.get('email', '')
-                    field_name = 'Verify Email'
-                
-                # Fill the field if we determined a value
-                if value_to_fill:
-                    try:
-                        await input_field.click()
-                        await asyncio.sleep(0.3)
-                        await input_field.fill("")
-                        await asyncio.sleep(0.2)
-                        await input_field.type(value_to_fill, delay=30)
-                        logger.info(f"[OK] Filled {field_name}: {value_to_fill}")
-                        filled_count += 1
-                    except Exception as e:
-                        logger.warning(f"Error filling {field_name}: {e}")
+            filled_count += await self._fill_labeled_fields(_EMAIL_FIELD_PATTERNS, field_values)
             
             logger.info(f"Total fields filled: {filled_count}")
             await asyncio.sleep(1)
             
             # Save screenshot before submitting
-            await self._save_screenshot('form_before_submit')
+            self._debug_screenshot('form_before_submit')
             logger.info("Step 4: Looking for LOG ON button...")
             submit_clicked = False
             
-            buttons = await self.page.query_selector_all("button")
-            logger.info(f"Found {len(buttons)} buttons on page:")
-            
-            for idx, btn in enumerate(buttons):
-                btn_text = await btn.text_content()
-                logger.info(f"  Button {idx}: text='{btn_text}'")
-            
-            # Find the LOG ON button specifically
-            for btn in buttons:
-                btn_text = await btn.text_content()
-                if btn_text and 'log on' in btn_text.lower():
-                    try:
-                        # Try JavaScript click first
-                        try:
-                            await self.page.evaluate("el => el.click()", btn)
-                            logger.info(f"[OK] Clicked LOG ON button via JavaScript")
-                            submit_clicked = True
-                            break
-                        except Exception as js_error:
-                            logger.debug(f"JavaScript click failed: {js_error}")
-                            # Fallback to Playwright click with force
-                            await btn.click(force=True, timeout=5000)
-                            logger.info(f"[OK] Clicked LOG ON button via Playwright")
-                            submit_clicked = True
-                            break
-                    except Exception as e:
-                        logger.warning(f"Error clicking LOG ON button: {e}")
-            
-            if not submit_clicked:
-                logger.warning("Could not find LOG ON button - trying any submit-like button")
-                for btn in buttons:
-                    btn_text = await btn.text_content()
-                    if btn_text:
-                        btn_text_lower = btn_text.lower().strip()
-                        if any(keyword in btn_text_lower for keyword in ['submit', 'continue', 'next', 'ok', 'accept']):
-                            try:
-                                await self.page.evaluate("el => el.click()", btn)
-                                logger.info(f"[OK] Clicked button: {btn_text.strip()}")
-                                submit_clicked = True
-                                break
-                            except Exception as e:
-                                logger.warning(f"Error clicking button: {e}")
+            try:
+                await self.page.get_by_role("button", name=_LOG_ON_BUTTON_RE).first.click(
+                    force=True, no_wait_after=True, timeout=5000
+                )
+                logger.info("[OK] Clicked LOG ON button")
+                submit_clicked = True
+            except Exception as e:
+                logger.warning(f"Could not click LOG ON button: {e} - trying any submit-like button")
+                try:
+                    await self.page.get_by_role("button", name=_SUBMIT_BUTTON_RE).first.click(
+                        force=True, no_wait_after=True, timeout=5000
+                    )
+                    logger.info("[OK] Clicked submit-like button")
+                    submit_clicked = True
+                except Exception as e:
+                    logger.warning(f"Error clicking button: {e}")
             
             if not submit_clicked:
                 logger.warning("Could not find and click submit button")
+            else:
+                # Start listening for the OTP email now so its arrival overlaps with the page transition
+                self._start_otp_listener()
             
             # Save screenshot after form submission attempt
-            await self._save_screenshot('form_after_submit')
+            self._debug_screenshot('form_after_submit')
             
             # Wait briefly for page to respond and load OTP page if required
             logger.info("Waiting for page to load after form submission...")
@@ -406,14 +424,55 @@ class DPSAppointmentChecker:
         except PlaywrightTimeout as e:
             logger.error(f"Timeout while filling login form: {str(e)}")
             if self.config['screenshot_on_error']:
-                await self._save_screenshot('login_form_timeout')
+                self._spawn_io(self._save_screenshot('login_form_timeout'))
             return False
         except Exception as e:
             logger.error(f"Error filling login form: {str(e)}")
             if self.config['screenshot_on_error']:
-                await self._save_screenshot('login_form_error')
+                self._spawn_io(self._save_screenshot('login_form_error'))
             return False
     
+    async def _fill_labeled_fields(self, patterns, field_values: Dict) -> int:
+        """
+        Fill text inputs located by their accessible name (label, aria-label or placeholder)
+        
+        Args:
+            patterns: (pattern, config key, display name) tuples
+            field_values: Values to fill keyed by config key
+            
+        Returns:
+            Number of fields written
+        """
+        filled_count = 0
+        for pattern, config_key, field_name in patterns:
+            value_to_fill = field_values[config_key]
+            if not value_to_fill:
+                continue
+            
+            input_field = self.page.get_by_role("textbox", name=pattern).first
+            try:
+                if await input_field.count() == 0:
+                    logger.info(f"No field found for {field_name}")
+                    continue
+                
+                # Skip the write if the field already holds the intended value
+                current_value = await input_field.input_value()
+                if self._field_matches(current_value, value_to_fill, field_name):
+                    logger.info(f"Field '{field_name}' already filled with: {current_value}")
+                    continue
+                
+                await input_field.click()
+                await asyncio.sleep(0.3)
+                await input_field.fill("")
+                await asyncio.sleep(0.2)
+                await input_field.type(value_to_fill, delay=30)
+                logger.info(f"[OK] Filled {field_name}: {value_to_fill}")
+                filled_count += 1
+            except Exception as e:
+                logger.warning(f"Error filling {field_name}: {e}")
+        
+        return filled_count
+    
     async def handle_otp_verification(self) -> bool:
         """
         Handle OTP verification by reading from email and filling the form
@@ -430,59 +489,48 @@ class DPSAppointmentChecker:
             logger.info(f"Current URL: {current_url}")
             
             # Save screenshot to see current state
-            await self._save_screenshot('otp_check')
+            self._debug_screenshot('otp_check')
             
-            # Wait a bit more for page to fully load - OTP field might appear after form submission
+            # fill_login_form already waited for the post-LOG ON load, so give the OTP field a moment only
             logger.info("Waiting for potential OTP field to appear...")
-            try:
-                await self.page.wait_for_load_state('networkidle', timeout=8000)
-            except PlaywrightTimeout:
-                logger.info("Page still loading, continuing...")
-            
             await asyncio.sleep(1)
             
             # List all input fields to see what's available
-            inputs = await self.page.query_selector_all("input")
-            logger.info(f"Found {len(inputs)} input fields on page")
-            for idx, inp in enumerate(inputs):
-                inp_type = await inp.get_attribute("type")
-                inp_id = await inp.get_attribute("id")
-                inp_placeholder = await inp.get_attribute("placeholder")
-                logger.info(f"  Input {idx}: type='{inp_type}', id='{inp_id}', placeholder='{inp_placeholder}'")
+            snapshot = await self._snapshot_inputs()
+            logger.info(f"Found {len(snapshot)} input fields on page")
+            for idx, info in enumerate(snapshot):
+                logger.info(f"  Input {idx}: type='{info['type']}', id='{info['id']}', placeholder='{info['placeholder']}', label='{info['labelText']}'")
             
             # Check if OTP field exists on page - look for common patterns
-            otp_selectors = [
-                "input[type='text'][placeholder*='pass']",
-                "input[type='text'][placeholder*='code']", 
-                "input[id*='otp']",
-                "input[id*='passcode']",
-                "input[placeholder*='passcode']",
-                "input[placeholder*='code']",
-                "input[type='text']",  # Any text input as fallback
-            ]
-            
-            otp_field = None
-            for selector in otp_selectors:
-                otp_field = await self.page.query_selector(selector)
+            handle = await self.page.evaluate_handle(_FIRST_MATCH_JS, _OTP_FIELD_SELECTORS) # type: ignore
+            otp_field = handle.as_element()
+            if otp_field:
+                logger.info("Found OTP field")
+            else:
+                # Any text input as fallback
+                otp_field = await self.page.query_selector("input[type='text']")
                 if otp_field:
-                    logger.info(f"Found OTP field with selector: {selector}")
-                    break
+                    logger.info("Found OTP field with fallback selector: input[type='text']")
             
             if not otp_field:
                 logger.info("No OTP field found - proceeding without OTP")
+                self._cancel_otp_listener()
                 return True
             
             logger.info("OTP verification required - reading OTP from email...")
             
             try:
-                # Initialize OTP handler
-                otp_handler = OTPHandler(
-                    email_address=self.config.get('email', ''),
-                    smtp_password=self.config.get('smtp_password', '')
-                )
+                # The listener is normally already running since LOG ON was clicked
+                if self._otp_task is None:
+                    self._start_otp_listener()
                 
                 # Get OTP from email (wait up to 120 seconds)
-                otp_code = await otp_handler.get_otp_from_email(timeout=120, check_interval=5)
+                try:
+                    otp_code = await asyncio.wait_for(self._otp_task, timeout=120) # type: ignore
+                except asyncio.TimeoutError:
+                    otp_code = None
+                finally:
+                    self._otp_task = None
                 
                 if not otp_code:
                     logger.warning("Could not retrieve OTP from email — waiting for manual bypass...")
@@ -507,22 +555,16 @@ class DPSAppointmentChecker:
                 logger.info(f"[OK] Filled OTP field: {otp_code}")
                 
                 # Save screenshot before clicking verify
-                await self._save_screenshot('otp_before_verify')
+                self._debug_screenshot('otp_before_verify')
                 
                 # Click Verify button
-                verify_button = await self.page.query_selector("button:has-text('VERIFY'), button:has-text('Verify')")
-                if verify_button:
-                    await verify_button.click()
+                try:
+                    await self.page.get_by_role("button", name=_VERIFY_BUTTON_RE).first.click(
+                        force=True, no_wait_after=True, timeout=5000
+                    )
                     logger.info("[OK] Clicked VERIFY button")
-                else:
-                    # Try to find verify button by other means
-                    buttons = await self.page.query_selector_all("button")
-                    for btn in buttons:
-                        btn_text = await btn.text_content()
-                        if btn_text and 'verify' in btn_text.lower():
-                            await btn.click()
-                            logger.info(f"[OK] Clicked button: {btn_text.strip()}")
-                            break
+                except Exception as e:
+                    logger.warning(f"Error clicking VERIFY button: {e}")
                 
                 # Wait for verification to complete
                 await asyncio.sleep(2)
@@ -541,72 +583,36 @@ class DPSAppointmentChecker:
         except Exception as e:
             logger.error(f"Error handling OTP verification: {str(e)}")
             if self.config['screenshot_on_error']:
-                await self._save_screenshot('otp_error')
+                self._spawn_io(self._save_screenshot('otp_error'))
             return False
     
     
     async def select_appointment_type(self) -> bool:
         """Select 'New Appointment' and service type"""
         try:
-            # First, let's see what buttons are available
-            buttons = await self.page.query_selector_all("button")
-            logger.info(f"Found {len(buttons)} buttons on page:")
-            for idx, btn in enumerate(buttons):
-                btn_text = await btn.text_content()
-                logger.info(f"  Button {idx}: '{btn_text}'")
-            
             # Wait for page to load
             await asyncio.sleep(1)
             
-            # Try to find and click "New Appointment" button
-            new_appt_clicked = False
-            for btn in buttons:
-                btn_text = await btn.text_content()
-                if btn_text and 'new' in btn_text.lower() and 'appointment' in btn_text.lower():
-                    try:
-                        await btn.click()
-                        logger.info(f"Clicked 'New Appointment' button")
-                        new_appt_clicked = True
-                        break
-                    except Exception as e:
-                        logger.warning(f"Error clicking button: {e}")
-            
-            if not new_appt_clicked:
-                logger.error("Could not find and click 'New Appointment' button")
+            # Click "New Appointment" - the role locator matches the button text in the browser
+            try:
+                await self.page.get_by_role("button", name=_NEW_APPOINTMENT_BUTTON_RE).first.click(timeout=5000)
+                logger.info("Clicked 'New Appointment' button")
+            except Exception as e:
+                logger.error(f"Could not find and click 'New Appointment' button: {e}")
                 return False
             
             await asyncio.sleep(2)
             
-            # Wait for service type options to appear
-            buttons = await self.page.query_selector_all("button")
-            logger.info(f"Found {len(buttons)} buttons after New Appointment:")
-            
-            # Try to find and click service type button
+            # Click the service type button, falling back to any DL service option
             service_clicked = False
-            for btn in buttons:
-                btn_text = await btn.text_content()
-                if btn_text and 'apply' in btn_text.lower() and 'texas' in btn_text.lower():
-                    try:
-                        await btn.click()
-                        logger.info(f"Clicked service type button: '{btn_text.strip()}'")
-                        service_clicked = True
-                        break
-                    except Exception as e:
-                        logger.warning(f"Error clicking service button: {e}")
-            
-            if not service_clicked:
-                # Try a more generic approach
-                logger.info("Could not find 'Apply for first time Texas DL/PERMIT' - trying any service button")
-                for idx, btn in enumerate(buttons):
-                    btn_text = await btn.text_content() or ""
-                    if len(btn_text) > 10 and 'dl' in btn_text.lower():  # Looks like a service option
-                        try:
-                            await btn.click()
-                            logger.info(f"Clicked service button {idx}: '{str(btn_text).strip()}'")
-                            service_clicked = True
-                            break
-                        except Exception as e:
-                            logger.warning(f"Error clicking service button: {e}")
+            for pattern in (_SERVICE_BUTTON_RE, _ANY_DL_SERVICE_BUTTON_RE):
+                try:
+                    await self.page.get_by_role("button", name=pattern).first.click(timeout=5000)
+                    logger.info(f"Clicked service type button matching '{pattern.pattern}'")
+                    service_clicked = True
+                    break
+                except Exception as e:
+                    logger.warning(f"Error clicking service button: {e}")
             
             if not service_clicked:
                 logger.error("Could not find service type button")
@@ -618,7 +624,7 @@ class DPSAppointmentChecker:
         except PlaywrightTimeout:
             logger.error("Timeout while selecting appointment type")
             if self.config['screenshot_on_error']:
-                await self._save_screenshot('appointment_type_timeout')
+                self._spawn_io(self._save_screenshot('appointment_type_timeout'))
             return False
         except Exception as e:
             logger.error(f"Error selecting appointment type: {str(e)}")
@@ -646,7 +652,7 @@ class DPSAppointmentChecker:
         except PlaywrightTimeout:
             logger.error("Timeout while searching location")
             if self.config['screenshot_on_error']:
-                await self._save_screenshot('location_search_timeout')
+                self._spawn_io(self._save_screenshot('location_search_timeout'))
             return False
         except Exception as e:
             logger.error(f"Error searching location: {str(e)}")
@@ -660,37 +666,48 @@ class DPSAppointmentChecker:
             Dictionary with location and appointment details, or None if not found
         """
         try:
+            # Prefer the availability JSON captured from the scheduler API over DOM scraping
+            if self._latest_availability:
+                appointments = self._parse_availability(self._latest_availability)
+                if appointments:
+                    self._debug_screenshot('slots_page')
+                    logger.info(f"Found {appointments['total_slots']} available dates from API response")
+                    return appointments
+            
+            # Proceed as soon as a date is rendered instead of sleeping a fixed time
             logger.info("Waiting for appointment slots page to load...")
-            await asyncio.sleep(3)
+            try:
+                await self.page.wait_for_selector(_DATE_TEXT_SELECTOR, timeout=5000)
+            except PlaywrightTimeout:
+                logger.info("No date rendered within 5s - reading the page anyway")
             
             # Take screenshot to see what we're working with
-            await self._save_screenshot('slots_page')
+            self._debug_screenshot('slots_page')
             
-            # Get page content
-            page_text = await self.page.locator("body").text_content()
-            page_content = await self.page.content()
+            # Get the rendered page text - dates only appear as visible text, so the HTML markup is not needed
+            page_text = await self.page.locator("body").text_content() or ""
             
             logger.info(f"Page content preview: {page_text[:200]}")
             
+            # Bail out on an empty page or the explicit no-slots message before any regex/DOM work
+            if not page_text or "no appointment" in page_text.lower():
+                logger.info("Page reports no appointments available")
+                return None
+            
             # Look for any location name in the page (not just "Denton")
             # The page might show different location names
             location_found = None
             
             # Check if we have any recognizable location keywords
-            location_keywords = ['denton', 'arlington', 'dallas', 'houston', 'austin', 'san antonio']
-            for keyword in location_keywords:
-                if keyword in page_text.lower():
-                    location_found = keyword.title()
-                    logger.info(f"Found location keyword: {location_found}")
-                    break
+            match = _LOCATION_KEYWORD_RE.search(page_text)
+            if match:
+                location_found = match.group(1).title()
+                logger.info(f"Found location keyword: {location_found}")
             
             # If no specific location found, check if page has appointment slots at all
             if not location_found:
                 # Check for any date patterns which indicate appointments exist
-                date_pattern = r'\d{1,2}/\d{1,2}/\d{4}'
-                dates = re.findall(date_pattern, page_content)
-                
-                if dates:
+                if _DATE_RE.search(page_text):
                     logger.info(f"Found appointment dates even without location name")
                     location_found = "Available Location"
                 else:
@@ -702,38 +719,23 @@ class DPSAppointmentChecker:
             # Extract date information from clickable date cards first
             unique_dates = []
             seen_dates = set()
-            date_pattern = re.compile(r"\d{1,2}/\d{1,2}/\d{4}")
-            date_buttons = self.page.locator("button, [role='button']").filter(
-                has_text=re.compile(r"Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday|\d{1,2}/\d{1,2}/\d{4}", re.I)
-            )
-            btn_count = await date_buttons.count()
-            logger.info(f"Found {btn_count} date-like buttons on appointments page")
-            for i in range(min(btn_count, 30)):
-                try:
-                    btn = date_buttons.nth(i)
-                    if not await btn.is_visible():
-                        continue
-                    btn_text = (await btn.text_content() or "").strip()
-                    if "Next Available Date" in btn_text:
-                        continue
-                    for match in date_pattern.findall(btn_text):
-                        if match not in seen_dates:
-                            seen_dates.add(match)
-                            unique_dates.append(match)
-                except Exception:
+            button_texts = await self.page.eval_on_selector_all("button, [role='button']", _VISIBLE_TEXTS_JS)
+            date_cards = [text.strip() for text in button_texts if _DATE_CARD_TEXT_RE.search(text)]
+            logger.info(f"Found {len(date_cards)} date-like buttons on appointments page")
+            for btn_text in date_cards[:30]:
+                if "Next Available Date" in btn_text:
                     continue
+                for match in _DATE_RE.findall(btn_text):
+                    if match not in seen_dates:
+                        seen_dates.add(match)
+                        unique_dates.append(match)
             
             # Fallback to full page parse if needed
             if not unique_dates:
-                dates = date_pattern.findall(page_content)
-                unique_dates = list(set(dates))
+                unique_dates = list({m.group(0) for m in _DATE_RE.finditer(page_text)})
             
-            # Sort dates if possible
-            try:
-                from datetime import datetime as dt
-                unique_dates = sorted(unique_dates, key=lambda x: dt.strptime(x, '%m/%d/%Y'))
-            except:
-                pass  # If sorting fails, just use them as-is
+            # Sort dates chronologically
+            unique_dates.sort(key=_date_sort_key)
             
             if unique_dates:
                 logger.info(f"Found {len(unique_dates)} available dates: {unique_dates[:5]}...")
@@ -752,21 +754,116 @@ class DPSAppointmentChecker:
         except asyncio.TimeoutError as e:
             logger.warning(f"Timeout getting available appointments: {str(e)}")
             if self.config['screenshot_on_error']:
-                await self._save_screenshot('get_appointments_timeout')
+                self._spawn_io(self._save_screenshot('get_appointments_timeout'))
             return None
         except Exception as e:
             logger.error(f"Error getting available appointments: {str(e)}")
             if self.config['screenshot_on_error']:
-                await self._save_screenshot('get_appointments_error')
+                self._spawn_io(self._save_screenshot('get_appointments_error'))
+            return None
+    
+    async def _snapshot_inputs(self) -> List[Dict]:
+        """Read type/id/name/placeholder/value and label text of every input in one evaluate call"""
+        snapshot = await self.page.eval_on_selector_all("input", _INPUT_SNAPSHOT_JS) # type: ignore
+        for info in snapshot:
+            info['labelText'] = info['labelText'].strip()
+        return snapshot
+    
+    @staticmethod
+    def _field_matches(current: str, target: str, field_name: Optional[str]) -> bool:
+        """Check whether an input already holds the value we would type into it"""
+        if field_name == 'Date of Birth':
+            current, target = re.sub(r'\D', '', current), re.sub(r'\D', '', target)
+        return current.strip() == target.strip()
+    
+    def _parse_availability(self, data) -> Optional[Dict]:
+        """Build the appointments dict from a captured availability API payload
+        
+        Only one location's dates are reported: the one whose name contains the
+        configured location_preference, else the first location listing any dates.
+        """
+        locations = data if isinstance(data, list) else [data]
+        preference = (self.config.get('location_preference') or '').lower()
+        
+        def collect(value, dates: List[str]):
+            if isinstance(value, str):
+                for match in _DATE_RE.findall(value):
+                    if match not in dates:
+                        dates.append(match)
+            elif isinstance(value, dict):
+                for item in value.values():
+                    collect(item, dates)
+            elif isinstance(value, list):
+                for item in value:
+                    collect(item, dates)
+        
+        location_found = None
+        unique_dates: List[str] = []
+        for location in locations:
+            if not isinstance(location, dict):
+                continue
+            name = location.get('Name') or location.get('LocationName')
+            dates: List[str] = []
+            collect(location, dates)
+            if not dates:
+                continue
+            if preference and name and preference in name.lower():
+                location_found, unique_dates = name, dates
+                break
+            if not unique_dates:
+                location_found, unique_dates = name, dates
+        
+        if not unique_dates:
             return None
+        
+        unique_dates.sort(key=_date_sort_key)
+        
+        return {
+            'location': location_found or self.config['location_preference'],
+            'zip_code': self.config['zip_code'],
+            'next_available': unique_dates[0],
+            'available_dates': unique_dates[:15],
+            'total_slots': len(unique_dates),
+            'checked_at': datetime.now().isoformat()
+        }
+    
+    def _start_otp_listener(self):
+        """Start a background IMAP IDLE listener for the OTP email"""
+        self._cancel_otp_listener()
+        self._otp_task = asyncio.create_task(self.otp_handler.wait_for_otp_idle(timeout=120, check_interval=5))
+    
+    def _cancel_otp_listener(self):
+        """Cancel a pending OTP listener, if any"""
+        if self._otp_task is not None:
+            if not self._otp_task.done():
+                self._otp_task.cancel()
+            self._otp_task = None
+    
+    @classmethod
+    def _ensure_dir(cls, path: str):
+        """Create an output directory once per process instead of on every save"""
+        if path not in cls._dirs_created:
+            os.makedirs(path, exist_ok=True)
+            cls._dirs_created.add(path)
+    
+    def _spawn_io(self, coro):
+        """Run screenshot/result I/O in the background; pending tasks are awaited before the context closes"""
+        task = asyncio.create_task(coro)
+        self._io_tasks.add(task)
+        task.add_done_callback(self._io_tasks.discard)
+    
+    def _debug_screenshot(self, name: str):
+        """Take a progress screenshot in the background when DEBUG_SCREENSHOTS is enabled"""
+        if self.config.get('debug_screenshots'):
+            self._spawn_io(self._save_screenshot(name))
     
     async def _save_screenshot(self, name: str):
         """Save screenshot for debugging"""
         try:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"screenshots/{name}_{timestamp}.png"
-            os.makedirs('screenshots', exist_ok=True)
-            await self.page.screenshot(path=filename)
+            filename = f"screenshots/{name}_{timestamp}.jpg"
+            self._ensure_dir('screenshots')
+            await self.page.screenshot(path=filename, type='jpeg', quality=60, full_page=False)
             logger.info(f"Screenshot saved: {filename}")
         except Exception as e:
             logger.error(f"Failed to save screenshot: {str(e)}")
@@ -820,15 +917,15 @@ class DPSAppointmentChecker:
                 logger.info(f"Next available: {appointments['next_available']}")
                 logger.info(f"Total slots: {appointments['total_slots']}")
                 
+                # Save to file in the background while the notification is sent
+                self._spawn_io(asyncio.to_thread(self._save_results, appointments))
+                
                 # Send notification
                 await self.notifier.send_notification(
                     subject=f"DPS Appointments Available in {appointments['location']}!",
                     appointments=appointments
                 )
                 
-                # Save to file
-                self._save_results(appointments)
-                
                 return appointments
             else:
                 logger.info("No appointments currently available")
@@ -837,7 +934,7 @@ class DPSAppointmentChecker:
         except Exception as e:
             logger.error(f"Error during appointment check: {str(e)}")
             if self.config['screenshot_on_error'] and self.page:
-                await self._save_screenshot('check_error')
+                self._spawn_io(self._save_screenshot('check_error'))
             return None
         finally:
             await self.cleanup()
@@ -845,7 +942,7 @@ class DPSAppointmentChecker:
     def _save_results(self, appointments: Dict):
         """Save appointment results to JSON file"""
         try:
-            os.makedirs('results', exist_ok=True)
+            self._ensure_dir('results')
             filename = f"results/appointments_found_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
             
             with open(filename, 'w') as f:
@@ -856,38 +953,53 @@ class DPSAppointmentChecker:
             logger.error(f"Failed to save results: {str(e)}")
     
     async def cleanup(self):
-        """Cleanup browser resources"""
+        """Cleanup browser resources (only the context when the browser is kept alive)"""
         try:
-            if self.page:
-                try:
-                    await self.page.close()
-                except Exception as e:
-                    logger.debug(f"Error closing page: {e}")
-            if self.browser:
+            self._cancel_otp_listener()
+            await self._close_context()
+            if self._keep_browser:
+                logger.info("Browser context cleanup completed")
+                return
+            await self.otp_handler.close()
+            await self.notifier.aclose()
+            if self.browser and not self._external_browser:
                 try:
                     await self.browser.close()
                 except Exception as e:
                     logger.debug(f"Error closing browser: {e}")
+            self.browser = None
+            await self._stop_playwright()
             logger.info("Browser cleanup completed")
         except Exception as e:
             logger.debug(f"Error during cleanup: {str(e)}")
+    
+    async def _stop_playwright(self):
+        """Stop the Playwright driver started by _launch_browser, if any"""
+        playwright, self._playwright = self._playwright, None
+        if playwright:
+            try:
+                await playwright.stop()
+            except Exception as e:
+                logger.debug(f"Error stopping playwright: {e}")
 
 
 async def main():
     """Main entry point"""
     checker = DPSAppointmentChecker()
-    try:
-        result = await checker.check_appointments()
-        
-        if result:
-            logger.info("Check completed - Appointments found!")
-            return 0
-        else:
+    interval = checker.config.get('check_interval_minutes', 0)
+    # One browser serves every check; each check still gets a fresh context
+    async with checker:
+        while True:
+            result = await checker.check_appointments()
+            
+            if result:
+                logger.info("Check completed - Appointments found!")
+                return 0
             logger.info("Check completed - No appointments available")
-            return 1
-    finally:
-        # Ensure cleanup happens
-        await checker.cleanup()
+            if interval <= 0:
+                return 1
+            logger.info(f"Next check in {interval} minutes")
+            await asyncio.sleep(interval * 60)
 
 
 if __name__ == "__main__":
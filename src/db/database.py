@@ -5,17 +5,105 @@ Uses aiosqlite for async operations.
 
 import os
 import json
+import asyncio
+import logging
+import time
 import uuid
 import aiosqlite  # type: ignore
+from functools import lru_cache
 from datetime import datetime
-from typing import Optional, List, Dict
+from typing import AsyncIterator, Optional, List, Dict
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
+# available_dates is stored as JSON text; use orjson's C encoder/decoder when installed
+try:
+    import orjson  # type: ignore
+
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_dumps = json.dumps
+    _json_loads = json.loads
+
 
 # Database file location
 DB_DIR = Path(__file__).parent.parent.parent / "data"
 DB_PATH = DB_DIR / "dps_agent.db"
 
+# Connection tuning. WAL turns each commit into an append to the log, and
+# synchronous=NORMAL only fsyncs at checkpoints: a power loss can drop the
+# last few commits but never corrupts the database, which is acceptable for
+# job/log bookkeeping that is rewritten on the next check.
+_CONNECTION_PRAGMAS = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA mmap_size=268435456;
+    PRAGMA cache_size=-64000;
+"""
+
+# Column order of the users, jobs and booking_results tables, shared by INSERTs and the dicts they return
+_USER_COLUMNS = (
+    "id", "first_name", "last_name", "dob", "ssn_last4", "phone", "email",
+    "zip_code", "location_preference", "max_distance_miles", "slot_priority",
+    "has_texas_license", "has_out_of_state_license", "license_expired",
+    "license_lost_stolen", "is_commercial", "id_only", "needs_permit", "age",
+    "notify_email", "smtp_server", "smtp_port", "smtp_user", "smtp_password",
+    "recommended_service", "created_at", "updated_at",
+)
+_JOB_COLUMNS = (
+    "id", "user_id", "service_type", "status", "check_interval_minutes",
+    "auto_book", "attempts", "max_attempts", "last_check_at",
+    "appointment_date", "appointment_location", "created_at", "updated_at",
+)
+_BOOKING_COLUMNS = (
+    "id", "job_id", "location", "appointment_date", "available_dates",
+    "total_slots", "booking_confirmed", "confirmation_id", "checked_at",
+)
+
+# Job statuses returned by get_active_jobs; must match the idx_jobs_active partial index
+# text exactly for SQLite to use it
+_ACTIVE_JOB_STATUSES = "('pending', 'running', 'monitoring', 'appointment_found', 'booking', 'otp_waiting')"
+
+_INSERT_LOG_SQL = """INSERT INTO agent_logs (id, job_id, timestamp, level, message, screenshot_path)
+            VALUES (?, ?, ?, ?, ?, ?)"""
+
+# Queued log entries are written in batches of up to this many rows, at most
+# _LOG_FLUSH_INTERVAL seconds after the first one arrives
+_LOG_BUFFER_SIZE = 100
+_LOG_FLUSH_INTERVAL = 0.5
+# add_log waits once this many entries are queued
+_LOG_QUEUE_SIZE = 10000
+
+
+def _dict_factory(cursor, row) -> Dict:
+    """Row factory building plain dicts straight from the cursor's column names."""
+    return {col[0]: row[i] for i, col in enumerate(cursor.description)}
+
+
+# (epoch second, ISO prefix) of the last timestamp; the date part only changes once per second
+_ts_cache = [0, ""]
+
+
+def _now_iso() -> str:
+    """Current local time as ISO 8601 with microseconds, formatting the date part once per second."""
+    now = time.time()
+    second = int(now)
+    if second != _ts_cache[0]:
+        _ts_cache[0], _ts_cache[1] = second, datetime.fromtimestamp(second).isoformat()
+    return f"{_ts_cache[1]}.{int((now - second) * 1_000_000):06d}"
+
+
+@lru_cache(maxsize=64)
+def _build_update_sql(table: str, cols: tuple) -> str:
+    """UPDATE statement for a set of columns; repeated update shapes reuse the same string."""
+    assignments = "".join(f"{col} = ?, " for col in cols)
+    return f"UPDATE {table} SET {assignments}updated_at = ? WHERE id = ?"
+
 
 class Database:
     """Async SQLite database manager."""
@@ -23,17 +111,24 @@ class Database:
     def __init__(self, db_path: Optional[str] = None):
         self.db_path = db_path or str(DB_PATH)
         self._connection: Optional[aiosqlite.Connection] = None
+        self._log_queue: Optional[asyncio.Queue] = None
+        self._log_writer: Optional[asyncio.Task] = None
+        # Serializes every write and its commit on the shared connection, so no task
+        # commits or rolls back another task's half-done transaction
+        self._write_lock = asyncio.Lock()
 
     async def connect(self):
         """Open database connection and create tables."""
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
         self._connection = await aiosqlite.connect(self.db_path)
         if self._connection:
-            self._connection.row_factory = aiosqlite.Row  # type: ignore
+            self._connection.row_factory = _dict_factory  # type: ignore
+        await self.conn.executescript(_CONNECTION_PRAGMAS)
         await self._create_tables()
 
     async def close(self):
         """Close database connection."""
+        await self.stop_log_writer()
         if self._connection:
             await self._connection.close()  # type: ignore
             self._connection = None
@@ -47,7 +142,7 @@ class Database:
     # ─── Table creation ──────────────────────────────────────────
 
     async def _create_tables(self):
-        await self.conn.executescript("""
+        await self.conn.executescript(f"""
             CREATE TABLE IF NOT EXISTS users (
                 id TEXT PRIMARY KEY,
                 first_name TEXT NOT NULL,
@@ -120,197 +215,237 @@ class Database:
 
             CREATE INDEX IF NOT EXISTS idx_jobs_user_id ON jobs(user_id);
             CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status);
-            CREATE INDEX IF NOT EXISTS idx_agent_logs_job_id ON agent_logs(job_id);
             CREATE INDEX IF NOT EXISTS idx_booking_results_job_id ON booking_results(job_id);
+            CREATE INDEX IF NOT EXISTS idx_agent_logs_job_ts ON agent_logs(job_id, timestamp DESC);
+            -- Superseded by idx_agent_logs_job_ts; only adds work to every log insert
+            DROP INDEX IF EXISTS idx_agent_logs_job_id;
+            CREATE INDEX IF NOT EXISTS idx_jobs_active ON jobs(status) WHERE status IN {_ACTIVE_JOB_STATUSES};
         """)
         await self.conn.commit()
 
     # ─── User CRUD ───────────────────────────────────────────────
 
     async def create_user(self, data: Dict) -> Optional[Dict]:
-        user_id = str(uuid.uuid4())
-        now = datetime.now().isoformat()
-        await self.conn.execute(
-            """INSERT INTO users (id, first_name, last_name, dob, ssn_last4, phone, email,
-                zip_code, location_preference, max_distance_miles, slot_priority,
-                has_texas_license, has_out_of_state_license, license_expired,
-                license_lost_stolen, is_commercial, id_only, needs_permit, age,
-                notify_email, smtp_server, smtp_port, smtp_user, smtp_password,
-                recommended_service, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (user_id, data["first_name"], data["last_name"], data["dob"],
-             data["ssn_last4"], data["phone"], data["email"],
-             data.get("zip_code", "76201"), data.get("location_preference", "Denton"),
-             data.get("max_distance_miles", 25), data.get("slot_priority", "any"),
-             int(data.get("has_texas_license", False)),
-             int(data.get("has_out_of_state_license", False)),
-             int(data.get("license_expired", False)),
-             int(data.get("license_lost_stolen", False)),
-             int(data.get("is_commercial", False)),
-             int(data.get("id_only", False)),
-             int(data.get("needs_permit", False)),
-             data.get("age"),
-             data.get("notify_email", data["email"]),
-             data.get("smtp_server", "smtp.gmail.com"),
-             data.get("smtp_port", 587),
-             data.get("smtp_user"),
-             data.get("smtp_password"),
-             data.get("recommended_service"),
-             now, now)
+        now = _now_iso()
+        row = (str(uuid.uuid4()), data["first_name"], data["last_name"], data["dob"],
+               data["ssn_last4"], data["phone"], data["email"],
+               data.get("zip_code", "76201"), data.get("location_preference", "Denton"),
+               data.get("max_distance_miles", 25), data.get("slot_priority", "any"),
+               int(data.get("has_texas_license", False)),
+               int(data.get("has_out_of_state_license", False)),
+               int(data.get("license_expired", False)),
+               int(data.get("license_lost_stolen", False)),
+               int(data.get("is_commercial", False)),
+               int(data.get("id_only", False)),
+               int(data.get("needs_permit", False)),
+               data.get("age"),
+               data.get("notify_email", data["email"]),
+               data.get("smtp_server", "smtp.gmail.com"),
+               data.get("smtp_port", 587),
+               data.get("smtp_user"),
+               data.get("smtp_password"),
+               data.get("recommended_service"),
+               now, now)
+        await self._write(
+            f"""INSERT INTO users ({', '.join(_USER_COLUMNS)})
+            VALUES ({', '.join('?' * len(_USER_COLUMNS))})""",
+            row
         )
-        await self.conn.commit()
-        return await self.get_user(user_id)
+        # The row is exactly what was written, so skip re-reading it
+        return dict(zip(_USER_COLUMNS, row))
 
     async def get_user(self, user_id: str) -> Optional[Dict]:
         cursor = await self.conn.execute("SELECT * FROM users WHERE id = ?", (user_id,))
         row = await cursor.fetchone()
         if row:
-            return self._row_to_dict(row)
+            return row
         return None
 
     async def get_all_users(self) -> List[Dict]:
-        cursor = await self.conn.execute("SELECT * FROM users ORDER BY created_at DESC")
-        rows = await cursor.fetchall()
-        return [self._row_to_dict(r) for r in rows]
+        return list(await self.conn.execute_fetchall("SELECT * FROM users ORDER BY created_at DESC"))
 
     async def update_user(self, user_id: str, data: Dict) -> Optional[Dict]:
-        fields = []
-        values = []
-        for key, value in data.items():
-            if key in ("id", "created_at"):
-                continue
-            if isinstance(value, bool):
-                value = int(value)
-            fields.append(f"{key} = ?")
-            values.append(value)
-        fields.append("updated_at = ?")
-        values.append(datetime.now().isoformat())
-        values.append(user_id)
-
-        await self.conn.execute(
-            f"UPDATE users SET {', '.join(fields)} WHERE id = ?", values
-        )
-        await self.conn.commit()
+        await self._update_row("users", user_id, data)
         return await self.get_user(user_id)
 
     async def delete_user(self, user_id: str) -> bool:
-        cursor = await self.conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
-        await self.conn.commit()
+        cursor = await self._write("DELETE FROM users WHERE id = ?", (user_id,))
         return cursor.rowcount > 0
 
     # ─── Job CRUD ────────────────────────────────────────────────
 
     async def create_job(self, data: Dict) -> Optional[Dict]:
-        job_id = str(uuid.uuid4())
-        now = datetime.now().isoformat()
-        await self.conn.execute(
-            """INSERT INTO jobs (id, user_id, service_type, status,
-                check_interval_minutes, auto_book, attempts, max_attempts,
-                created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (job_id, data["user_id"], data["service_type"],
-             data.get("status", "pending"),
-             data.get("check_interval_minutes", 5),
-             int(data.get("auto_book", True)),
-             0, data.get("max_attempts", 100),
-             now, now)
+        now = _now_iso()
+        row = (str(uuid.uuid4()), data["user_id"], data["service_type"],
+               data.get("status", "pending"),
+               data.get("check_interval_minutes", 5),
+               int(data.get("auto_book", True)),
+               0, data.get("max_attempts", 100),
+               None, None, None,
+               now, now)
+        await self._write(
+            f"""INSERT INTO jobs ({', '.join(_JOB_COLUMNS)})
+            VALUES ({', '.join('?' * len(_JOB_COLUMNS))})""",
+            row
         )
-        await self.conn.commit()
-        return await self.get_job(job_id)
+        return dict(zip(_JOB_COLUMNS, row))
 
     async def get_job(self, job_id: str) -> Optional[Dict]:
         cursor = await self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
         row = await cursor.fetchone()
         if row:
-            return self._row_to_dict(row)
+            return row
         return None
 
     async def get_all_jobs(self) -> List[Dict]:
-        cursor = await self.conn.execute("SELECT * FROM jobs ORDER BY created_at DESC")
-        rows = await cursor.fetchall()
-        return [self._row_to_dict(r) for r in rows]
+        return list(await self.conn.execute_fetchall("SELECT * FROM jobs ORDER BY created_at DESC"))
 
     async def get_jobs_by_user(self, user_id: str) -> List[Dict]:
-        cursor = await self.conn.execute(
+        return list(await self.conn.execute_fetchall(
             "SELECT * FROM jobs WHERE user_id = ? ORDER BY created_at DESC",
             (user_id,)
-        )
-        rows = await cursor.fetchall()
-        return [self._row_to_dict(r) for r in rows]
+        ))
 
     async def get_active_jobs(self) -> List[Dict]:
-        cursor = await self.conn.execute(
-            "SELECT * FROM jobs WHERE status IN ('pending', 'running', 'monitoring', 'appointment_found', 'booking', 'otp_waiting')"
-        )
-        rows = await cursor.fetchall()
-        return [self._row_to_dict(r) for r in rows]
+        return list(await self.conn.execute_fetchall(
+            f"SELECT * FROM jobs WHERE status IN {_ACTIVE_JOB_STATUSES}"
+        ))
 
     async def update_job(self, job_id: str, data: Dict) -> Optional[Dict]:
-        fields = []
-        values = []
-        for key, value in data.items():
-            if key in ("id", "created_at"):
-                continue
-            if isinstance(value, bool):
-                value = int(value)
-            fields.append(f"{key} = ?")
-            values.append(value)
-        fields.append("updated_at = ?")
-        values.append(datetime.now().isoformat())
-        values.append(job_id)
-
-        await self.conn.execute(
-            f"UPDATE jobs SET {', '.join(fields)} WHERE id = ?", values
-        )
-        await self.conn.commit()
+        await self._update_row("jobs", job_id, data)
         return await self.get_job(job_id)
 
     async def delete_job(self, job_id: str) -> bool:
-        cursor = await self.conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
-        await self.conn.commit()
+        cursor = await self._write("DELETE FROM jobs WHERE id = ?", (job_id,))
         return cursor.rowcount > 0
 
     # ─── Agent Logs ──────────────────────────────────────────────
 
     async def add_log(self, job_id: str, message: str, level: str = "info",
                       screenshot_path: Optional[str] = None) -> Dict:
+        """Record a log entry for a job.
+
+        While the background log writer is running the row is only queued, so it
+        shows up in get_logs up to _LOG_FLUSH_INTERVAL seconds later; await
+        flush() first when it has to be visible.
+        """
         log_id = str(uuid.uuid4())
-        now = datetime.now().isoformat()
-        await self.conn.execute(
-            """INSERT INTO agent_logs (id, job_id, timestamp, level, message, screenshot_path)
-            VALUES (?, ?, ?, ?, ?, ?)""",
-            (log_id, job_id, now, level, message, screenshot_path)
-        )
-        await self.conn.commit()
+        now = _now_iso()
+        row = (log_id, job_id, now, level, message, screenshot_path)
+        if self._log_queue is not None:
+            await self._log_queue.put(row)
+        else:
+            await self._write(_INSERT_LOG_SQL, row)
         return {"id": log_id, "job_id": job_id, "timestamp": now,
                 "level": level, "message": message, "screenshot_path": screenshot_path}
 
+    def start_log_writer(self):
+        """Queue add_log rows for a background task that writes them in batches."""
+        if self._log_writer is None:
+            self._log_queue = asyncio.Queue(maxsize=_LOG_QUEUE_SIZE)
+            self._log_writer = asyncio.create_task(self._write_logs(self._log_queue))
+
+    async def flush(self):
+        """Wait until every log entry queued so far has been written and committed."""
+        if self._log_queue is not None:
+            done = asyncio.get_running_loop().create_future()
+            await self._log_queue.put(done)
+            await done
+
+    async def stop_log_writer(self):
+        """Write out everything still queued and stop the background writer."""
+        writer, self._log_writer = self._log_writer, None
+        log_queue, self._log_queue = self._log_queue, None
+        if writer is not None:
+            await log_queue.put(None)  # type: ignore
+            await writer
+
+    async def _write_logs(self, log_queue: asyncio.Queue):
+        """Background task: insert queued log rows with one executemany and commit per batch.
+
+        A None entry stops the writer; a future entry (from flush) ends the
+        current batch early and is resolved once that batch is committed.
+        """
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            rows: List[tuple] = []
+            flushed: List[asyncio.Future] = []
+            deadline = None
+            while len(rows) < _LOG_BUFFER_SIZE:
+                timeout = None if deadline is None else deadline - loop.time()
+                if timeout is not None and timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(log_queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if row is None:
+                    stopping = True
+                    break
+                if isinstance(row, asyncio.Future):
+                    flushed.append(row)
+                    break
+                rows.append(row)
+                if deadline is None:
+                    deadline = loop.time() + _LOG_FLUSH_INTERVAL
+            if stopping:
+                # Pick up rows from add_log calls that were still waiting on a full queue
+                while not log_queue.empty():
+                    row = log_queue.get_nowait()
+                    if isinstance(row, asyncio.Future):
+                        flushed.append(row)
+                    elif row is not None:
+                        rows.append(row)
+            if rows:
+                try:
+                    async with self._write_lock:
+                        await self.conn.executemany(_INSERT_LOG_SQL, rows)
+                        await self.conn.commit()
+                except Exception as e:
+                    logger.error(f"Failed to write {len(rows)} agent log entries: {e}")
+            for done in flushed:
+                if not done.done():
+                    done.set_result(None)
+
     async def get_logs(self, job_id: str, limit: int = 50) -> List[Dict]:
-        cursor = await self.conn.execute(
+        return list(await self.conn.execute_fetchall(
             "SELECT * FROM agent_logs WHERE job_id = ? ORDER BY timestamp DESC LIMIT ?",
             (job_id, limit)
-        )
-        rows = await cursor.fetchall()
-        return [self._row_to_dict(r) for r in rows]
+        ))
 
     # ─── Booking Results ─────────────────────────────────────────
 
     async def add_booking_result(self, data: Dict) -> Optional[Dict]:
-        result_id = str(uuid.uuid4())
-        now = datetime.now().isoformat()
-        available_dates = json.dumps(data.get("available_dates", []))
-        await self.conn.execute(
-            """INSERT INTO booking_results (id, job_id, location, appointment_date,
-                available_dates, total_slots, booking_confirmed, confirmation_id, checked_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (result_id, data["job_id"], data["location"], data["appointment_date"],
-             available_dates, data.get("total_slots", 0),
-             int(data.get("booking_confirmed", False)),
-             data.get("confirmation_id"),
-             now)
-        )
-        await self.conn.commit()
-        return await self.get_booking_result(result_id)
+        return (await self.add_booking_results_bulk([data]))[0]
+
+    async def add_booking_results_bulk(self, results: List[Dict]) -> List[Dict]:
+        """Insert several booking results in one transaction (a single commit)."""
+        now = _now_iso()
+        rows = [(str(uuid.uuid4()), data["job_id"], data["location"], data["appointment_date"],
+                 _json_dumps(data.get("available_dates", [])), data.get("total_slots", 0),
+                 int(data.get("booking_confirmed", False)),
+                 data.get("confirmation_id"),
+                 now) for data in results]
+        # Every writer holds the lock through its commit, so this transaction is ours alone
+        async with self._write_lock:
+            await self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                await self.conn.executemany(
+                    f"""INSERT INTO booking_results ({', '.join(_BOOKING_COLUMNS)})
+                    VALUES ({', '.join('?' * len(_BOOKING_COLUMNS))})""",
+                    rows
+                )
+                await self.conn.commit()
+            except Exception:
+                await self.conn.rollback()
+                raise
+        created = []
+        for row in rows:
+            d = dict(zip(_BOOKING_COLUMNS, row))
+            d["available_dates"] = _json_loads(d["available_dates"])
+            created.append(d)
+        return created
 
     async def get_booking_result(self, result_id: str) -> Optional[Dict]:
         cursor = await self.conn.execute(
@@ -318,42 +453,57 @@ class Database:
         )
         row = await cursor.fetchone()
         if row:
-            d = self._row_to_dict(row)
-            if isinstance(d.get("available_dates"), str):
-                d["available_dates"] = json.loads(d["available_dates"])
-            return d
+            return self._booking_to_dict(row)
         return None
 
     async def get_booking_results_by_job(self, job_id: str) -> List[Dict]:
-        cursor = await self.conn.execute(
+        rows = await self.conn.execute_fetchall(
             "SELECT * FROM booking_results WHERE job_id = ? ORDER BY checked_at DESC",
             (job_id,)
         )
-        rows = await cursor.fetchall()
-        results = []
-        for r in rows:
-            d = self._row_to_dict(r)
-            if isinstance(d.get("available_dates"), str):
-                d["available_dates"] = json.loads(d["available_dates"])
-            results.append(d)
-        return results
+        return [self._booking_to_dict(r) for r in rows]
 
-    async def get_all_bookings(self) -> List[Dict]:
+    async def iter_all_bookings(self, chunk: int = 256) -> AsyncIterator[Dict]:
+        """Yield booking results newest first, fetching `chunk` rows at a time."""
         cursor = await self.conn.execute(
             "SELECT * FROM booking_results ORDER BY checked_at DESC"
         )
-        rows = await cursor.fetchall()
-        results = []
-        for r in rows:
-            d = self._row_to_dict(r)
-            if isinstance(d.get("available_dates"), str):
-                d["available_dates"] = json.loads(d["available_dates"])
-            results.append(d)
-        return results
+        try:
+            while True:
+                rows = await cursor.fetchmany(chunk)
+                if not rows:
+                    break
+                for r in rows:
+                    yield self._booking_to_dict(r)
+        finally:
+            await cursor.close()
+
+    async def get_all_bookings(self) -> List[Dict]:
+        rows = await self.conn.execute_fetchall(
+            "SELECT * FROM booking_results ORDER BY checked_at DESC"
+        )
+        return [self._booking_to_dict(r) for r in rows]
 
     # ─── Helpers ─────────────────────────────────────────────────
 
+    async def _update_row(self, table: str, row_id: str, data: Dict):
+        """Update the given columns of a row and bump its updated_at."""
+        cols = tuple(sorted(k for k in data if k not in ("id", "created_at")))
+        values = [int(data[c]) if isinstance(data[c], bool) else data[c] for c in cols]
+        values.append(_now_iso())
+        values.append(row_id)
+        await self._write(_build_update_sql(table, cols), values)
+
+    async def _write(self, sql: str, params=()) -> aiosqlite.Cursor:
+        """Run one write statement and commit it while holding the write lock."""
+        async with self._write_lock:
+            cursor = await self.conn.execute(sql, params)
+            await self.conn.commit()
+            return cursor
+
     @staticmethod
-    def _row_to_dict(row) -> Dict:
-        """Convert an aiosqlite Row to a regular dict."""
-        return dict(row)
+    def _booking_to_dict(row: Dict) -> Dict:
+        """Convert a booking_results row, decoding the stored available_dates JSON."""
+        if isinstance(row.get("available_dates"), str):
+            row["available_dates"] = _json_loads(row["available_dates"])
+        return row
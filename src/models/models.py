@@ -4,8 +4,11 @@ Pydantic models for API validation + SQLAlchemy ORM for persistence.
 """
 
 import enum
+import sys
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
 from datetime import datetime, date
-from typing import Optional, List
+from typing import Any, Dict, Optional, List, Tuple
 from pydantic import BaseModel, Field, EmailStr
 
 
@@ -48,6 +51,12 @@ class SlotPriority(str, enum.Enum):
     ANY = "any"
 
 
+# Value -> member lookups used when hydrating runtime classes from stored strings
+_JOB_STATUS_BY_VALUE = {e.value: e for e in JobStatus}
+_LOG_LEVEL_BY_VALUE = {e.value: e for e in LogLevel}
+_SLOT_PRIORITY_BY_VALUE = {e.value: e for e in SlotPriority}
+
+
 # ─── Pydantic Schemas (API layer) ────────────────────────────────────
 
 class UserProfileCreate(BaseModel):
@@ -174,76 +183,138 @@ class AnalyzeResponse(BaseModel):
 # SQLAlchemy ORM, keeping the project lean. The schemas above
 # define the table shapes.
 
+# slots=True drops the per-instance __dict__; it is only accepted from Python 3.10
+_DATACLASS_OPTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@lru_cache(maxsize=None)
+def _field_kinds(cls) -> Tuple[frozenset, frozenset, frozenset]:
+    """(all, bool, datetime) field names of a runtime dataclass."""
+    fs = fields(cls)
+    return (
+        frozenset(f.name for f in fs),
+        frozenset(f.name for f in fs if f.type is bool),
+        frozenset(f.name for f in fs if f.type in (datetime, Optional[datetime])),
+    )
+
+
+def _row_values(cls, row: Dict[str, Any]) -> Dict[str, Any]:
+    """Constructor arguments from a table row.
+
+    Columns the dataclass has no field for are dropped (its generated __init__
+    rejects unknown keywords); stored 0/1 flags become bools and ISO 8601
+    text becomes datetimes.
+    """
+    names, flags, stamps = _field_kinds(cls)
+    values = {}
+    for key, value in row.items():
+        if key not in names:
+            continue
+        if value is not None:
+            if key in flags:
+                value = bool(value)
+            elif key in stamps and isinstance(value, str):
+                value = datetime.fromisoformat(value)
+        values[key] = value
+    return values
+
+
+@dataclass(**_DATACLASS_OPTS)
 class UserProfile:
     """Runtime data class for a stored user profile."""
-    def __init__(self, **kwargs):
-        self.id: str = kwargs.get("id", "")
-        self.first_name: str = kwargs.get("first_name", "")
-        self.last_name: str = kwargs.get("last_name", "")
-        self.dob: str = kwargs.get("dob", "")
-        self.ssn_last4: str = kwargs.get("ssn_last4", "")
-        self.phone: str = kwargs.get("phone", "")
-        self.email: str = kwargs.get("email", "")
-        self.zip_code: str = kwargs.get("zip_code", "76201")
-        self.location_preference: str = kwargs.get("location_preference", "Denton")
-        self.max_distance_miles: int = kwargs.get("max_distance_miles", 25)
-        self.slot_priority: str = kwargs.get("slot_priority", "any")
-        self.has_texas_license: bool = kwargs.get("has_texas_license", False)
-        self.has_out_of_state_license: bool = kwargs.get("has_out_of_state_license", False)
-        self.license_expired: bool = kwargs.get("license_expired", False)
-        self.license_lost_stolen: bool = kwargs.get("license_lost_stolen", False)
-        self.is_commercial: bool = kwargs.get("is_commercial", False)
-        self.id_only: bool = kwargs.get("id_only", False)
-        self.needs_permit: bool = kwargs.get("needs_permit", False)
-        self.age: Optional[int] = kwargs.get("age")
-        self.notify_email: Optional[str] = kwargs.get("notify_email")
-        self.smtp_server: str = kwargs.get("smtp_server", "smtp.gmail.com")
-        self.smtp_port: int = kwargs.get("smtp_port", 587)
-        self.smtp_user: Optional[str] = kwargs.get("smtp_user")
-        self.smtp_password: Optional[str] = kwargs.get("smtp_password")
-        self.recommended_service: Optional[str] = kwargs.get("recommended_service")
-        self.created_at: datetime = kwargs.get("created_at", datetime.now())
-        self.updated_at: datetime = kwargs.get("updated_at", datetime.now())
+    id: str = ""
+    first_name: str = ""
+    last_name: str = ""
+    dob: str = ""
+    ssn_last4: str = ""
+    phone: str = ""
+    email: str = ""
+    zip_code: str = "76201"
+    location_preference: str = "Denton"
+    max_distance_miles: int = 25
+    slot_priority: SlotPriority = SlotPriority.ANY
+    has_texas_license: bool = False
+    has_out_of_state_license: bool = False
+    license_expired: bool = False
+    license_lost_stolen: bool = False
+    is_commercial: bool = False
+    id_only: bool = False
+    needs_permit: bool = False
+    age: Optional[int] = None
+    notify_email: Optional[str] = None
+    smtp_server: str = "smtp.gmail.com"
+    smtp_port: int = 587
+    smtp_user: Optional[str] = None
+    smtp_password: Optional[str] = None
+    recommended_service: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.now)
+    updated_at: datetime = field(default_factory=datetime.now)
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "UserProfile":
+        """Build from a users table row."""
+        values = _row_values(cls, row)
+        values["slot_priority"] = _SLOT_PRIORITY_BY_VALUE.get(row.get("slot_priority"), SlotPriority.ANY)
+        return cls(**values)
 
 
+@dataclass(**_DATACLASS_OPTS)
 class BookingJob:
     """Runtime data class for a booking job."""
-    def __init__(self, **kwargs):
-        self.id: str = kwargs.get("id", "")
-        self.user_id: str = kwargs.get("user_id", "")
-        self.service_type: str = kwargs.get("service_type", "")
-        self.status: str = kwargs.get("status", JobStatus.PENDING.value)
-        self.check_interval_minutes: int = kwargs.get("check_interval_minutes", 5)
-        self.auto_book: bool = kwargs.get("auto_book", True)
-        self.attempts: int = kwargs.get("attempts", 0)
-        self.max_attempts: int = kwargs.get("max_attempts", 100)
-        self.last_check_at: Optional[datetime] = kwargs.get("last_check_at")
-        self.appointment_date: Optional[str] = kwargs.get("appointment_date")
-        self.appointment_location: Optional[str] = kwargs.get("appointment_location")
-        self.created_at: datetime = kwargs.get("created_at", datetime.now())
-        self.updated_at: datetime = kwargs.get("updated_at", datetime.now())
+    id: str = ""
+    user_id: str = ""
+    service_type: str = ""
+    status: JobStatus = JobStatus.PENDING
+    check_interval_minutes: int = 5
+    auto_book: bool = True
+    attempts: int = 0
+    max_attempts: int = 100
+    last_check_at: Optional[datetime] = None
+    appointment_date: Optional[str] = None
+    appointment_location: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.now)
+    updated_at: datetime = field(default_factory=datetime.now)
 
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "BookingJob":
+        """Build from a jobs table row."""
+        values = _row_values(cls, row)
+        values["status"] = _JOB_STATUS_BY_VALUE.get(row.get("status"), JobStatus.PENDING)
+        return cls(**values)
 
+
+@dataclass(**_DATACLASS_OPTS)
 class AgentLog:
     """Runtime data class for an agent log entry."""
-    def __init__(self, **kwargs):
-        self.id: str = kwargs.get("id", "")
-        self.job_id: str = kwargs.get("job_id", "")
-        self.timestamp: datetime = kwargs.get("timestamp", datetime.now())
-        self.level: str = kwargs.get("level", LogLevel.INFO.value)
-        self.message: str = kwargs.get("message", "")
-        self.screenshot_path: Optional[str] = kwargs.get("screenshot_path")
+    id: str = ""
+    job_id: str = ""
+    timestamp: datetime = field(default_factory=datetime.now)
+    level: LogLevel = LogLevel.INFO
+    message: str = ""
+    screenshot_path: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "AgentLog":
+        """Build from an agent_logs table row."""
+        values = _row_values(cls, row)
+        values["level"] = _LOG_LEVEL_BY_VALUE.get(row.get("level"), LogLevel.INFO)
+        return cls(**values)
 
 
+@dataclass(**_DATACLASS_OPTS)
 class BookingResult:
     """Runtime data class for a booking result."""
-    def __init__(self, **kwargs):
-        self.id: str = kwargs.get("id", "")
-        self.job_id: str = kwargs.get("job_id", "")
-        self.location: str = kwargs.get("location", "")
-        self.appointment_date: str = kwargs.get("appointment_date", "")
-        self.available_dates: List[str] = kwargs.get("available_dates", [])
-        self.total_slots: int = kwargs.get("total_slots", 0)
-        self.booking_confirmed: bool = kwargs.get("booking_confirmed", False)
-        self.confirmation_id: Optional[str] = kwargs.get("confirmation_id")
-        self.checked_at: datetime = kwargs.get("checked_at", datetime.now())
+    id: str = ""
+    job_id: str = ""
+    location: str = ""
+    appointment_date: str = ""
+    available_dates: List[str] = field(default_factory=list)
+    total_slots: int = 0
+    booking_confirmed: bool = False
+    confirmation_id: Optional[str] = None
+    checked_at: datetime = field(default_factory=datetime.now)
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "BookingResult":
+        """Build from a booking_results table row."""
+        return cls(**_row_values(cls, row))
@@ -13,12 +13,15 @@ async def reset_jobs():
     db = Database()
     await db.connect()
     
-    # Delete all from dependent tables first
-    await db.conn.execute("DELETE FROM agent_logs")
-    await db.conn.execute("DELETE FROM booking_results")
-    await db.conn.execute("DELETE FROM jobs")
+    # Delete all from dependent tables first, in one write transaction
+    await db.conn.executescript("""
+        BEGIN IMMEDIATE;
+        DELETE FROM agent_logs;
+        DELETE FROM booking_results;
+        DELETE FROM jobs;
+        COMMIT;
+    """)
     
-    await db.conn.commit()
     await db.close()
     print("✅ All previous jobs and history cleared.")
 
@@ -2,11 +2,19 @@
 Logging configuration for DPS Monitor
 """
 
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 import io
 from datetime import datetime
 from pathlib import Path
+from typing import Dict
+
+# One background listener per log file; loggers only enqueue records for it to write
+_file_queues: Dict[str, queue.SimpleQueue] = {}
+_listeners: Dict[str, logging.handlers.QueueListener] = {}
 
 
 def _safe_console_stream():
@@ -51,29 +59,50 @@ def setup_logger(name: str, log_file: str = None, level: int = logging.INFO) ->
     console_handler.setFormatter(simple_formatter)
     logger.addHandler(console_handler)
     
-    # File handler (if log_file specified)
+    # File handler (if log_file specified), written from a background thread
     if log_file:
         # Create logs directory if it doesn't exist
         log_path = Path(log_file)
         log_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setLevel(level)
-        file_handler.setFormatter(detailed_formatter)
-        logger.addHandler(file_handler)
     else:
         # Default log file
         logs_dir = Path('logs')
         logs_dir.mkdir(exist_ok=True)
-        default_log_path = logs_dir / f"dps_monitor_{datetime.now().strftime('%Y%m%d')}.log"
-        file_handler = logging.FileHandler(str(default_log_path))
-        file_handler.setLevel(level)
-        file_handler.setFormatter(detailed_formatter)
-        logger.addHandler(file_handler)
+        log_path = logs_dir / f"dps_monitor_{datetime.now().strftime('%Y%m%d')}.log"
+    
+    # Each logger gets its own handler (and level) on the file's shared queue
+    queue_handler = logging.handlers.QueueHandler(_file_queue(str(log_path), detailed_formatter))
+    queue_handler.setLevel(level)
+    logger.addHandler(queue_handler)
     
     return logger
 
 
+def _file_queue(path: str, formatter: logging.Formatter) -> queue.SimpleQueue:
+    """Return the queue read by the listener that owns the file handler for path"""
+    log_queue = _file_queues.get(path)
+    if log_queue is None:
+        file_handler = logging.FileHandler(path, delay=True)
+        file_handler.setFormatter(formatter)
+        
+        log_queue = _file_queues[path] = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+        listener.start()
+        _listeners[path] = listener
+    return log_queue
+
+
+@atexit.register
+def stop_log_listeners():
+    """Flush pending records and stop the background file writers"""
+    while _listeners:
+        _, listener = _listeners.popitem()
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+    _file_queues.clear()
+
+
 def get_logger(name: str) -> logging.Logger:
     """Get existing logger or create new one"""
     return logging.getLogger(name)
@@ -2,51 +2,33 @@
 Email notification module for sending appointment alerts
 """
 
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import asyncio
+import hashlib
+import html
+import io
+import json
+import re
+import string
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Optional
+from email.utils import getaddresses
+from functools import lru_cache
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# smtplib and email.mime are imported when a message is actually sent, keeping them
+# (and ssl/hmac/the header parser they pull in) out of processes that never send mail
+if TYPE_CHECKING:
+    import smtplib
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
 
-class EmailNotifier:
-    """Handles email notifications for appointment availability"""
-    
-    def __init__(self, config: Dict):
-        """
-        Initialize email notifier
-        
-        Args:
-            config: Configuration dictionary with SMTP settings
-        """
-        self.config = config
-        self.smtp_server = config.get('smtp_server', 'smtp.gmail.com')
-        self.smtp_port = config.get('smtp_port', 587)
-        self.smtp_user = config.get('smtp_user', '')
-        self.smtp_password = config.get('smtp_password', '')
-        self.notify_email = config.get('notify_email', '')
-    
-    def _create_email_body(self, appointments: Dict) -> tuple[str, str]:
-        """
-        Create email body in both plain text and HTML
-        
-        Args:
-            appointments: Dictionary with appointment information
-            
-        Returns:
-            Tuple of (plain_text, html_text)
-        """
-        location = appointments.get('location', 'Unknown')
-        next_available = appointments.get('next_available', 'Unknown')
-        available_dates = appointments.get('available_dates', [])
-        total_slots = appointments.get('total_slots', 0)
-        checked_at = appointments.get('checked_at', datetime.now().isoformat())
-        
-        # Plain text version
-        plain_text = f"""
+# Email bodies use str.format syntax, parsed once by _compile_template; literal braces in the CSS are doubled
+_PLAIN_TEMPLATE = """
 🎉 Texas DPS Appointment Available!
 
 Location: {location}
@@ -54,9 +36,9 @@ Next Available Date: {next_available}
 Total Slots Found: {total_slots}
 
 Available Dates:
-{chr(10).join(f"  • {date}" for date in available_dates[:10])}
+{dates_text}
 
-{"..." if len(available_dates) > 10 else ""}
+{more_text}
 
 ⚡ ACT FAST! Book your appointment now at:
 https://www.txdpsscheduler.com
@@ -64,14 +46,11 @@ https://www.txdpsscheduler.com
 Note: You will need to complete OTP verification during booking.
 
 ---
-Checked at: {datetime.fromisoformat(checked_at).strftime('%Y-%m-%d %I:%M:%S %p')}
+Checked at: {checked_at}
 Automated by DPS Appointment Monitor
 """
-        
-        # HTML version
-        dates_html = "".join([f"<li>{date}</li>" for date in available_dates[:10]])
-        
-        html_text = f"""
+
+_HTML_TEMPLATE = """
 <!DOCTYPE html>
 <html>
 <head>
@@ -163,11 +142,11 @@ Automated by DPS Appointment Monitor
     
     <div class="content">
         <div class="info-box">
-            <strong>📍 Location:</strong> {location}
+            <strong>📍 Location:</strong> {location_html}
         </div>
         
         <div class="info-box">
-            <strong>📅 Next Available Date:</strong> {next_available}
+            <strong>📅 Next Available Date:</strong> {next_available_html}
         </div>
         
         <div class="info-box">
@@ -178,7 +157,7 @@ Automated by DPS Appointment Monitor
             <h3>Available Dates:</h3>
             <ul>
                 {dates_html}
-                {"<li><em>...and more</em></li>" if len(available_dates) > 10 else ""}
+                {more_html}
             </ul>
         </div>
         
@@ -193,15 +172,238 @@ Automated by DPS Appointment Monitor
         </center>
         
         <div class="footer">
-            <p>Checked at: {datetime.fromisoformat(checked_at).strftime('%Y-%m-%d %I:%M:%S %p')}</p>
+            <p>Checked at: {checked_at}</p>
             <p>Automated by DPS Appointment Monitor</p>
         </div>
     </div>
 </body>
 </html>
 """
+
+
+# Blocking SMTP I/O runs here rather than on the loop's default executor, so slow mail
+# servers can't starve the IMAP/file work that shares that pool. Threads start lazily.
+_SMTP_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="smtp")
+
+# Each notifier keeps up to this many SMTP sessions so concurrent notifications don't queue
+# behind one connection; a session is retired after _SMTP_MAX_MESSAGES to stay under the
+# per-connection limits mail providers enforce
+_SMTP_POOL_SIZE = 4
+_SMTP_MAX_MESSAGES = 100
+
+# Port for SMTP over implicit TLS (RFC 8314), which needs no STARTTLS upgrade round trip
+_SMTPS_PORT = 465
+
+# Rendered bodies kept per notifier; the poller re-sends the same availability until it changes
+_BODY_CACHE_SIZE = 32
+
+# Leading dots in DATA lines are doubled (RFC 5321 4.5.2), as smtplib does
+_LEADING_DOT = re.compile(br'(?m)^\.')
+
+
+def _send_pipelined(server: "smtplib.SMTP", from_addr: str, to_addrs: List[str], msg: "MIMEMultipart"):
+    """
+    Send a message with MAIL FROM, RCPT TO and DATA written in one round trip (RFC 2920)
+    
+    smtplib waits for the reply to every command; with PIPELINING advertised the envelope
+    commands can go out together and their replies be read afterwards.
+    """
+    import smtplib
+    from email.generator import BytesGenerator
+    
+    buffer = io.BytesIO()
+    BytesGenerator(buffer, policy=msg.policy.clone(linesep='\r\n')).flatten(msg, linesep='\r\n')
+    payload = _LEADING_DOT.sub(b'..', buffer.getvalue())
+    # End DATA with <CRLF>.<CRLF> in a single copy, adding the last line break if missing
+    payload += b'.\r\n' if payload.endswith(b'\r\n') else b'\r\n.\r\n'
+    
+    commands = [f"MAIL FROM:<{from_addr}>"] + [f"RCPT TO:<{addr}>" for addr in to_addrs] + ["DATA"]
+    server.send("".join(command + "\r\n" for command in commands))
+    
+    # Drain every reply before acting on any of them so the session stays in sync
+    sender_reply = server.getreply()
+    refused = {}
+    for addr in to_addrs:
+        code, resp = server.getreply()
+        if code not in (250, 251):
+            refused[addr] = (code, resp)
+    data_code, data_resp = server.getreply()
+    
+    if data_code == 354 and (sender_reply[0] != 250 or len(refused) == len(to_addrs)):
+        # Server accepted DATA regardless; end it with an empty message before bailing out
+        server.send(b'.\r\n')
+        server.getreply()
+        data_code = 0
+    if sender_reply[0] != 250:
+        server.rset()
+        raise smtplib.SMTPSenderRefused(sender_reply[0], sender_reply[1], from_addr)
+    if len(refused) == len(to_addrs):
+        server.rset()
+        raise smtplib.SMTPRecipientsRefused(refused)
+    if data_code != 354:
+        server.rset()
+        raise smtplib.SMTPDataError(data_code, data_resp)
+    
+    server.send(payload)
+    code, resp = server.getreply()
+    if code != 250:
+        raise smtplib.SMTPDataError(code, resp)
+    return refused
+
+
+_CHECKED_AT_FORMAT = '%Y-%m-%d %I:%M:%S %p'
+
+
+@lru_cache(maxsize=64)
+def _format_checked_at(iso: str) -> str:
+    """Display form of an ISO checked_at stamp; one check's stamp is shared by all its notifications"""
+    return datetime.fromisoformat(iso).strftime(_CHECKED_AT_FORMAT)
+
+
+def _parse_recipients(value: Union[str, List[str], None]) -> List[str]:
+    """
+    Parse notify_email, given as a list or a comma-separated string, into bare addresses
+    
+    Entries may carry display names ("Jane <jane@example.com>"); ones without an address
+    are dropped with a warning so bad config shows up at startup rather than at send time.
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = [value]
+    recipients = []
+    for name, addr in getaddresses(value):
+        if '@' in addr:
+            recipients.append(addr)
+        elif name or addr:
+            logger.warning(f"Ignoring invalid notification address: {name or addr}")
+    return recipients
+
+
+def _compile_template(source: str) -> tuple:
+    """Split a str.format template into (literal, field) pairs once, so rendering is a single join"""
+    return tuple((literal, field) for literal, field, _, _ in string.Formatter().parse(source))
+
+
+def _render_template(compiled: tuple, context: Dict) -> str:
+    """Fill a compiled template from context"""
+    return "".join(
+        literal if field is None else literal + str(context[field])
+        for literal, field in compiled
+    )
+
+
+class _SMTPSession:
+    """A logged-in SMTP connection and how many messages it has carried"""
+    
+    __slots__ = ('smtp', 'sent')
+    
+    def __init__(self, smtp: "smtplib.SMTP"):
+        self.smtp = smtp
+        self.sent = 0
+
+
+class EmailNotifier:
+    """Handles email notifications for appointment availability"""
+    
+    # Headers marking alerts as high priority across mail clients; override in a subclass to change
+    _PRIORITY_HEADERS = MappingProxyType({
+        'X-Priority': '1',
+        'X-MSMail-Priority': 'High',
+        'Importance': 'high',
+    })
+    
+    # Compiled once at import and shared by every notifier
+    _template_cache: Dict[str, tuple] = {
+        'plain': _compile_template(_PLAIN_TEMPLATE),
+        'html': _compile_template(_HTML_TEMPLATE),
+    }
+    
+    def __init__(self, config: Dict):
+        """
+        Initialize email notifier
+        
+        Args:
+            config: Configuration dictionary with SMTP settings
+        """
+        self.config = config
+        self.smtp_server = config.get('smtp_server', 'smtp.gmail.com')
+        self.smtp_port = config.get('smtp_port', 587)
+        self.smtp_user = config.get('smtp_user', '')
+        self.smtp_password = config.get('smtp_password', '')
+        # All recipients go in one message over the one SMTP session
+        self.recipients = _parse_recipients(config.get('notify_email'))
+        self.notify_email = ', '.join(self.recipients)
+        self._configured = bool(self.smtp_user and self.smtp_password and self.recipients)
+        # Pool of SMTP sessions reused across notifications. Slots start empty (None) and are
+        # connected on first use; LIFO hands out the most recently used, still-warm session.
+        self._smtp_pool: "asyncio.LifoQueue[Optional[_SMTPSession]]" = asyncio.LifoQueue()
+        for _ in range(_SMTP_POOL_SIZE):
+            self._smtp_pool.put_nowait(None)
+        self._body_cache: "OrderedDict[str, tuple[str, str]]" = OrderedDict()
+        self._part_cache: "OrderedDict[tuple[str, str], tuple[MIMEText, MIMEText]]" = OrderedDict()
+    
+    def _create_email_body(self, appointments: Dict) -> tuple[str, str]:
+        """
+        Create email body in both plain text and HTML
+        
+        Args:
+            appointments: Dictionary with appointment information
+            
+        Returns:
+            Tuple of (plain_text, html_text)
+        """
+        # Without checked_at the body is stamped with the current time, so it can't be reused
+        if not appointments.get('checked_at'):
+            return self._render_email_body(appointments)
+        
+        key = hashlib.blake2b(
+            json.dumps(appointments, sort_keys=True, default=str).encode(), digest_size=16
+        ).hexdigest()
+        bodies = self._body_cache.get(key)
+        if bodies is not None:
+            self._body_cache.move_to_end(key)
+            return bodies
+        
+        bodies = self._body_cache[key] = self._render_email_body(appointments)
+        if len(self._body_cache) > _BODY_CACHE_SIZE:
+            self._body_cache.popitem(last=False)
+        return bodies
+    
+    def _render_email_body(self, appointments: Dict) -> tuple[str, str]:
+        """Render the plain text and HTML bodies for appointments"""
+        location = appointments.get('location', 'Unknown')
+        next_available = appointments.get('next_available', 'Unknown')
+        available_dates = appointments.get('available_dates', [])
+        total_slots = appointments.get('total_slots', 0)
+        checked_at = appointments.get('checked_at') or datetime.now()
+        
+        # Format the timestamp once for both bodies; callers may pass a datetime directly
+        if isinstance(checked_at, str):
+            checked_at = _format_checked_at(checked_at)
+        else:
+            checked_at = checked_at.strftime(_CHECKED_AT_FORMAT)
+        
+        shown_dates = available_dates[:10]
+        has_more = len(available_dates) > 10
+        # Date lists are joined once per body; values shown in the HTML body are escaped
+        context = {
+            'location': location,
+            'location_html': html.escape(str(location)),
+            'next_available': next_available,
+            'next_available_html': html.escape(str(next_available)),
+            'total_slots': total_slots,
+            'checked_at': checked_at,
+            'dates_text': "\n".join("  • " + date for date in shown_dates),
+            'more_text': "..." if has_more else "",
+            'dates_html': "".join(f"<li>{html.escape(date)}</li>" for date in shown_dates),
+            'more_html': "<li><em>...and more</em></li>" if has_more else "",
+        }
         
-        return plain_text, html_text
+        return (
+            _render_template(self._template_cache['plain'], context),
+            _render_template(self._template_cache['html'], context),
+        )
     
     async def send_notification(
         self, 
@@ -220,21 +422,21 @@ Automated by DPS Appointment Monitor
         Returns:
             True if email sent successfully, False otherwise
         """
+        if not self._configured:
+            logger.error("SMTP credentials or notification email not configured")
+            return False
+        
+        import smtplib
+        from email.mime.multipart import MIMEMultipart
+        
         try:
-            if not self.smtp_user or not self.smtp_password:
-                logger.error("SMTP credentials not configured")
-                return False
-            
-            if not self.notify_email:
-                logger.error("Notification email not configured")
-                return False
-            
             # Create message
             msg = MIMEMultipart('alternative')
             msg['Subject'] = subject
             msg['From'] = self.smtp_user
             msg['To'] = self.notify_email
-            msg['X-Priority'] = '1'  # High priority
+            for name, value in self._PRIORITY_HEADERS.items():
+                msg[name] = value
             
             # Create email body
             plain_text, html_text = self._create_email_body(appointments)
@@ -243,16 +445,23 @@ Automated by DPS Appointment Monitor
                 plain_text = f"{custom_message}\n\n{plain_text}"
             
             # Attach both plain text and HTML versions
-            msg.attach(MIMEText(plain_text, 'plain'))
-            msg.attach(MIMEText(html_text, 'html'))
+            for part in self._mime_parts(plain_text, html_text):
+                msg.attach(part)
             
             # Send email
             logger.info(f"Sending notification to {self.notify_email}")
             
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_user, self.smtp_password)
-                server.send_message(msg)
+            # SMTP is blocking; run it off the event loop so other jobs keep progressing
+            loop = asyncio.get_running_loop()
+            session = await self._smtp_pool.get()
+            try:
+                session = await loop.run_in_executor(_SMTP_EXECUTOR, self._send_message, session, msg)
+            except BaseException:
+                # _send_message closed the session; the slot reconnects on next use
+                session = None
+                raise
+            finally:
+                self._smtp_pool.put_nowait(session)
             
             logger.info(f"[OK] Notification sent successfully to {self.notify_email}")
             return True
@@ -267,6 +476,115 @@ Automated by DPS Appointment Monitor
             logger.error(f"[FAILED] Failed to send notification: {str(e)}")
             return False
     
+    def _mime_parts(self, plain_text: str, html_text: str) -> tuple["MIMEText", "MIMEText"]:
+        """
+        Return the encoded text/plain and text/html parts for the bodies
+        
+        Encoding the bodies to base64 is most of the cost of building a message, so the parts
+        are kept for repeat sends of the same bodies. Parts are never modified after creation,
+        which lets several messages share them.
+        """
+        from email.mime.text import MIMEText
+        
+        key = (plain_text, html_text)
+        parts = self._part_cache.get(key)
+        if parts is not None:
+            self._part_cache.move_to_end(key)
+            return parts
+        
+        parts = self._part_cache[key] = (MIMEText(plain_text, 'plain'), MIMEText(html_text, 'html'))
+        if len(self._part_cache) > _BODY_CACHE_SIZE:
+            self._part_cache.popitem(last=False)
+        return parts
+    
+    def _send_message(self, session: Optional[_SMTPSession], msg: "MIMEMultipart") -> Optional[_SMTPSession]:
+        """
+        Deliver a message over a pooled session (blocking, runs in executor)
+        
+        Returns:
+            The session to put back in the pool, or None once it has been closed
+        """
+        import smtplib
+        
+        try:
+            session = self._open_session(session)
+            try:
+                self._deliver(session.smtp, msg)
+            except smtplib.SMTPServerDisconnected:
+                # The server dropped the idle session; reconnect once and retry
+                session = self._open_session(None)
+                self._deliver(session.smtp, msg)
+        except Exception:
+            self._close_session(session)
+            raise
+        
+        session.sent += 1
+        if session.sent >= _SMTP_MAX_MESSAGES:
+            self._close_session(session)
+            return None
+        return session
+    
+    def _deliver(self, server: "smtplib.SMTP", msg: "MIMEMultipart"):
+        """Send over an open session, pipelining the envelope when the server supports it"""
+        if 'pipelining' in server.esmtp_features:
+            _send_pipelined(server, self.smtp_user, self.recipients, msg)
+        else:
+            server.send_message(msg)
+    
+    def _open_session(self, session: Optional[_SMTPSession]) -> _SMTPSession:
+        """Return session if it is still alive, otherwise connect and log in a new one (blocking)"""
+        import smtplib
+        
+        if session is not None:
+            try:
+                if session.smtp.noop()[0] == 250:
+                    return session
+            except smtplib.SMTPException:
+                pass
+            self._close_session(session)
+        
+        implicit_tls = int(self.smtp_port) == _SMTPS_PORT
+        smtp_cls = smtplib.SMTP_SSL if implicit_tls else smtplib.SMTP
+        server = smtp_cls(self.smtp_server, self.smtp_port)
+        try:
+            if not implicit_tls:
+                server.starttls()
+            server.login(self.smtp_user, self.smtp_password)
+        except Exception:
+            server.close()
+            raise
+        return _SMTPSession(server)
+    
+    @staticmethod
+    def _close_session(session: Optional[_SMTPSession]):
+        """Quit a pooled session, if any (blocking)"""
+        if session is None:
+            return
+        try:
+            session.smtp.quit()
+        except Exception:
+            session.smtp.close()
+    
+    def _close_smtp(self):
+        """Quit every idle pooled session (blocking; for use when no send is in flight)"""
+        sessions = []
+        while not self._smtp_pool.empty():
+            sessions.append(self._smtp_pool.get_nowait())
+        for session in sessions:
+            self._close_session(session)
+            self._smtp_pool.put_nowait(None)
+    
+    async def aclose(self):
+        """Close the pooled SMTP sessions, waiting for in-flight sends to finish"""
+        sessions = [await self._smtp_pool.get() for _ in range(_SMTP_POOL_SIZE)]
+        try:
+            loop = asyncio.get_running_loop()
+            for session in sessions:
+                await loop.run_in_executor(_SMTP_EXECUTOR, self._close_session, session)
+        finally:
+            for _ in sessions:
+                self._smtp_pool.put_nowait(None)
+    
     def send_test_email(self) -> bool:
         """
         Send a test email to verify configuration
@@ -274,6 +592,11 @@ Automated by DPS Appointment Monitor
         Returns:
             True if test email sent successfully, False otherwise
         """
+        # Don't spin up an event loop just to find the config missing
+        if not self._configured:
+            logger.error("SMTP credentials or notification email not configured")
+            return False
+        
         try:
             test_appointments = {
                 'location': 'Denton (Test)',
@@ -283,11 +606,14 @@ Automated by DPS Appointment Monitor
                 'checked_at': datetime.now().isoformat()
             }
             
-            return asyncio.run(self.send_notification(
-                subject="🧪 Test - DPS Monitor Email Configuration",
-                appointments=test_appointments,
-                custom_message="This is a test email to verify your DPS Monitor email configuration is working correctly."
-            ))
+            try:
+                return asyncio.run(self.send_notification(
+                    subject="🧪 Test - DPS Monitor Email Configuration",
+                    appointments=test_appointments,
+                    custom_message="This is a test email to verify your DPS Monitor email configuration is working correctly."
+                ))
+            finally:
+                self._close_smtp()
             
         except Exception as e:
             logger.error(f"Failed to send test email: {str(e)}")
@@ -295,9 +621,11 @@ Automated by DPS Appointment Monitor
 
 
 # For compatibility with sync code
-import asyncio
 
 def send_notification_sync(config: Dict, subject: str, appointments: Dict) -> bool:
     """Synchronous wrapper for sending notifications"""
     notifier = EmailNotifier(config)
-    return asyncio.run(notifier.send_notification(subject, appointments))
+    try:
+        return asyncio.run(notifier.send_notification(subject, appointments))
+    finally:
+        notifier._close_smtp()
@@ -3,15 +3,41 @@ OTP Handler - Reads OTP from email and extracts the code
 """
 
 import imaplib
-import email
 import asyncio
 import re
-from email.header import decode_header
+import select
+import threading
+import time
+from email.feedparser import BytesFeedParser
 from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Untagged "* <n> EXISTS" response sent by the server when the mailbox grows
+_EXISTS_RE = re.compile(rb"^\*\s+(\d+)\s+EXISTS", re.IGNORECASE)
+
+# Common OTP patterns, most specific first
+# Pattern 1: "passcode is XXXXXX" or "code is XXXXXX"
+_OTP_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'passcode[:\s]+([0-9]{4,6})',
+    r'code[:\s]+([0-9]{4,6})',
+    r'otp[:\s]+([0-9]{4,6})',
+    r'verification[:\s]+([0-9]{4,6})',
+    r'\b([0-9]{4,6})\b.*(?:passcode|code|otp|verify)',
+    r'<[^>]*>([0-9]{4,6})<[^>]*>',  # OTP in HTML tags
+))
+
+# Any 6-digit number as a last resort, searched only near the start of the body
+# (further down it is more likely a CSS colour or an id than the code)
+_OTP_FALLBACK_RE = re.compile(r'([0-9]{6})')
+_OTP_SCAN_LIMIT = 4096
+
+# Fast path: a 6-digit code right after one of the keywords as a whole word ("passcode is 123456")
+_OTP_KEYWORD_RE = re.compile(
+    r"\b(?:passcode|code|otp|verification)\b(?:\s+is)?[:\s]+([0-9]{6})\b", re.IGNORECASE
+)
+
 
 class OTPHandler:
     """Handle OTP verification by reading from email"""
@@ -28,8 +54,53 @@ class OTPHandler:
         self.email_address = email_address
         self.smtp_password = smtp_password
         self.imap_server = smtp_server.replace("smtp", "imap")
+        self._mail: Optional[imaplib.IMAP4_SSL] = None
         logger.info(f"OTP Handler initialized for {email_address}")
     
+    async def connect(self):
+        """Open and authenticate the IMAP connection ahead of time (async wrapper)"""
+        if self._mail is not None:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            self._mail = await loop.run_in_executor(None, self._login)
+            logger.info(f"[OK] IMAP connection opened to {self.imap_server}")
+        except Exception as e:
+            # Not fatal: the listener opens its own connection if none is pooled
+            logger.warning(f"Could not pre-open IMAP connection: {str(e)}")
+    
+    async def close(self):
+        """Log out of the pooled IMAP connection, if any"""
+        mail, self._mail = self._mail, None
+        if mail is not None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._logout, mail)
+    
+    def _login(self) -> imaplib.IMAP4_SSL:
+        """Open a new authenticated IMAP connection (blocking)"""
+        mail = imaplib.IMAP4_SSL(self.imap_server)
+        mail.login(self.email_address, self.smtp_password)
+        return mail
+    
+    @staticmethod
+    def _logout(mail: imaplib.IMAP4_SSL):
+        """Log out, ignoring errors from an already dropped connection (blocking)"""
+        try:
+            mail.logout()
+        except Exception:
+            pass
+    
+    def _acquire_connection(self) -> imaplib.IMAP4_SSL:
+        """Take the pooled connection if it is still alive, otherwise log in again (blocking)"""
+        mail, self._mail = self._mail, None
+        if mail is not None:
+            try:
+                mail.noop()
+                return mail
+            except Exception:
+                self._logout(mail)
+        return self._login()
+    
     async def get_otp_from_email(self, timeout: int = 120, check_interval: int = 5) -> Optional[str]:
         """
         Read OTP from the most recent email (async wrapper)
@@ -41,121 +112,262 @@ class OTPHandler:
         Returns:
             OTP code if found, None otherwise
         """
-        import time as time_module
+        start_time = time.time()
+        loop = asyncio.get_event_loop()
+        # One connection serves every poll; it is only reopened after an error
+        mail = None
         
-        start_time = time_module.time()
+        try:
+            while time.time() - start_time < timeout:
+                try:
+                    # Run blocking I/O in executor to avoid blocking event loop
+                    if mail is None:
+                        mail = await loop.run_in_executor(None, self._open_inbox)
+                    otp = await loop.run_in_executor(None, self._fetch_latest_otp, mail)
+                    
+                    if otp:
+                        logger.info(f"[OK] OTP found: {otp}")
+                        return otp
+                    
+                    elapsed = time.time() - start_time
+                    logger.info(f"Waiting for OTP... ({elapsed:.0f}s elapsed)")
+                    await asyncio.sleep(check_interval)
+                    
+                except Exception as e:
+                    logger.warning(f"Error checking email: {str(e)}")
+                    if mail is not None:
+                        await loop.run_in_executor(None, self._logout, mail)
+                        mail = None
+                    await asyncio.sleep(check_interval)
+        finally:
+            # Hand the connection back for the next check cycle
+            if mail is not None:
+                if self._mail is None:
+                    self._mail = mail
+                else:
+                    self._logout(mail)
         
-        while time_module.time() - start_time < timeout:
-            try:
-                # Run blocking I/O in executor to avoid blocking event loop
-                loop = asyncio.get_event_loop()
-                otp = await loop.run_in_executor(None, self._fetch_latest_otp)
-                
-                if otp:
-                    logger.info(f"[OK] OTP found: {otp}")
-                    return otp
+        logger.error(f"Timeout: OTP not received within {timeout} seconds")
+        return None
+    
+    async def wait_for_otp_idle(self, timeout: int = 120, check_interval: int = 5) -> Optional[str]:
+        """
+        Wait for a new OTP email using IMAP IDLE (async wrapper)
+        
+        Only messages that arrive after the listener starts are considered, so this
+        can be scheduled as soon as the login form is submitted and overlap with the
+        page transition to the OTP screen.
+        
+        Args:
+            timeout: Maximum time to wait for OTP in seconds
+            check_interval: Maximum length of a single IDLE (or NOOP poll) slice in seconds
+            
+        Returns:
+            OTP code if found, None otherwise
+        """
+        # Each listener gets its own stop flag so starting a new one never revives an old thread
+        stop = threading.Event()
+        loop = asyncio.get_running_loop()
+        try:
+            otp = await loop.run_in_executor(None, self._idle_for_otp, timeout, check_interval, stop)
+        except asyncio.CancelledError:
+            # Let the worker thread exit at the end of its current slice
+            stop.set()
+            raise
+        except Exception as e:
+            logger.warning(f"IMAP IDLE failed: {str(e)} - falling back to polling")
+            return await self.get_otp_from_email(timeout=timeout, check_interval=check_interval)
+        
+        if otp:
+            logger.info(f"[OK] OTP found: {otp}")
+        else:
+            logger.error(f"Timeout: OTP not received within {timeout} seconds")
+        return otp
+    
+    def _idle_for_otp(self, timeout: int, check_interval: int, stop: threading.Event) -> Optional[str]:
+        """Block on IMAP IDLE until a new email carries an OTP (blocking, runs in executor)"""
+        mail = self._acquire_connection()
+        reusable = False
+        try:
+            status, data = mail.select("INBOX")
+            seen = int(data[0] or 0) if status == "OK" else 0
+            use_idle = "IDLE" in mail.capabilities
+            if not use_idle:
+                logger.info("IMAP server does not support IDLE - polling with NOOP")
+            
+            deadline = time.monotonic() + timeout
+            while not stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    reusable = True
+                    return None
+                wait = min(check_interval, remaining)
                 
-                elapsed = time_module.time() - start_time
-                logger.info(f"Waiting for OTP... ({elapsed:.0f}s elapsed)")
-                await asyncio.sleep(check_interval)
+                if use_idle:
+                    count = self._idle_once(mail, wait, stop)
+                else:
+                    time.sleep(wait)
+                    mail.noop()
+                    _, exists = mail.response("EXISTS")
+                    count = int(exists[-1]) if exists and exists[-1] else None
                 
-            except Exception as e:
-                logger.warning(f"Error checking email: {str(e)}")
-                await asyncio.sleep(check_interval)
+                if count and count > seen:
+                    otp = self._fetch_otp_from_range(mail, seen, count)
+                    seen = count
+                    if otp:
+                        reusable = True
+                        return otp
+            return None
+        finally:
+            # Hand a healthy connection back for the next check cycle
+            if reusable and self._mail is None:
+                self._mail = mail
+            else:
+                self._logout(mail)
+    
+    def _idle_once(self, mail: imaplib.IMAP4_SSL, wait: float, stop: threading.Event) -> Optional[int]:
+        """Run a single IDLE/DONE cycle and return the new message count, if any"""
+        tag = mail._new_tag()
+        mail.send(tag + b" IDLE\r\n")
+        if not mail.readline().startswith(b"+"):
+            raise imaplib.IMAP4.error("IDLE rejected by server")
         
-        logger.error(f"Timeout: OTP not received within {timeout} seconds")
+        count = None
+        end = time.monotonic() + wait
+        while count is None and not stop.is_set():
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                break
+            if not self._input_buffered(mail):
+                ready, _, _ = select.select([mail.sock], [], [], min(remaining, 1.0))
+                if not ready:
+                    continue
+            match = _EXISTS_RE.match(mail.readline())
+            if match:
+                count = int(match.group(1))
+        
+        # Terminate IDLE and drain everything up to the tagged completion
+        mail.send(b"DONE\r\n")
+        while True:
+            line = mail.readline()
+            if not line or line.startswith(tag):
+                break
+            match = _EXISTS_RE.match(line)
+            if match:
+                count = int(match.group(1))
+        mail.tagged_commands.pop(tag, None)
+        return count
+    
+    @staticmethod
+    def _input_buffered(mail: imaplib.IMAP4_SSL) -> bool:
+        """Whether unread server data is already buffered by imaplib's file or the TLS layer"""
+        if mail.sock.pending():
+            return True
+        # select() only sees the socket, so peek at the file buffer without blocking
+        timeout = mail.sock.gettimeout()
+        mail.sock.setblocking(False)
+        try:
+            return bool(mail.file.peek(1))
+        except OSError:
+            return False
+        finally:
+            mail.sock.settimeout(timeout)
+    
+    def _fetch_otp_from_range(self, mail: imaplib.IMAP4_SSL, seen: int, count: int) -> Optional[str]:
+        """Check messages seen+1..count (newest first) for an OTP"""
+        for num in range(count, seen, -1):
+            # PEEK keeps the message unread so the UNSEEN polling fallback can still find it
+            status, msg_data = mail.fetch(str(num), "(BODY.PEEK[])")
+            if status != "OK" or not msg_data or not isinstance(msg_data[0], tuple):
+                continue
+            parser = BytesFeedParser()
+            parser.feed(msg_data[0][1])
+            otp = self._extract_otp_from_message(parser.close())
+            if otp:
+                return otp
         return None
     
-    def _fetch_latest_otp(self) -> Optional[str]:
-        """Fetch OTP from the latest email (blocking, runs in executor)"""
+    def _open_inbox(self) -> imaplib.IMAP4_SSL:
+        """Acquire a connection with INBOX selected (blocking)"""
+        mail = self._acquire_connection()
         try:
-            # Connect to IMAP server
-            mail = imaplib.IMAP4_SSL(self.imap_server)
-            mail.login(self.email_address, self.smtp_password)
-            
-            # Select inbox
             mail.select("INBOX")
-            
-            # Search for recent emails
-            status, messages = mail.search(None, "ALL")
-            
-            if status != "OK" or not messages[0]:
-                logger.debug("No emails found")
-                mail.close()
-                mail.logout()
-                return None
-            
-            # Get the latest email
-            email_ids = messages[0].split()
-            latest_email_id = email_ids[-1]
-            
-            # Fetch the email
-            status, msg_data = mail.fetch(latest_email_id, "(RFC822)")
-            
-            if status != "OK":
-                logger.debug("Could not fetch email")
-                mail.close()
-                mail.logout()
-                return None
-            
-            # Parse email
-            msg = email.message_from_bytes(msg_data[0][1])
-            
-            # Extract OTP from email body
-            otp = self._extract_otp_from_message(msg)
-            
-            mail.close()
-            mail.logout()
-            
-            return otp
-            
-        except imaplib.IMAP4.error as e:
-            logger.warning(f"IMAP error: {str(e)}")
+        except Exception:
+            self._logout(mail)
+            raise
+        return mail
+    
+    def _fetch_latest_otp(self, mail: imaplib.IMAP4_SSL) -> Optional[str]:
+        """Fetch OTP from the latest email over an open connection (blocking, runs in executor)"""
+        # Let the server filter down to today's unread emails
+        status, messages = mail.uid("SEARCH", None, "UNSEEN", "SINCE", time.strftime("%d-%b-%Y"))
+        
+        if status != "OK" or not messages[0]:
+            logger.debug("No emails found")
             return None
-        except Exception as e:
-            logger.warning(f"Error fetching email: {str(e)}")
+        
+        # Get the latest email
+        latest_uid = messages[0].split()[-1]
+        
+        # Fetch the whole message so its parts can be decoded; PEEK leaves it unread
+        status, msg_data = mail.uid("FETCH", latest_uid, "(BODY.PEEK[])")
+        
+        if status != "OK" or not msg_data or not isinstance(msg_data[0], tuple):
+            logger.debug("Could not fetch email")
             return None
+        
+        # The code may sit in a base64 or quoted-printable part, so parse before scanning
+        parser = BytesFeedParser()
+        parser.feed(msg_data[0][1])
+        return self._extract_otp_from_message(parser.close())
     
     def _extract_otp_from_message(self, msg) -> Optional[str]:
         """Extract OTP code from email message"""
         try:
-            # Get email body
-            body = ""
-            
+            # Get the text parts, plain before HTML; attachments are never decoded
             if msg.is_multipart():
-                for part in msg.walk():
-                    if part.get_content_type() == "text/plain":
-                        body += part.get_payload(decode=True).decode('utf-8', errors='ignore')
-                    elif part.get_content_type() == "text/html":
-                        body += part.get_payload(decode=True).decode('utf-8', errors='ignore')
+                parts = [part for part in msg.walk()
+                         if part.get_content_type() in ("text/plain", "text/html")]
+                parts.sort(key=lambda part: part.get_content_type() != "text/plain")
             else:
-                body = msg.get_payload(decode=True).decode('utf-8', errors='ignore')
+                parts = [msg]
             
-            logger.debug(f"Email body preview: {body[:200]}")
-            
-            # Look for common OTP patterns
-            # Pattern 1: "passcode is XXXXXX" or "code is XXXXXX"
-            patterns = [
-                r'passcode[:\s]+([0-9]{4,6})',
-                r'code[:\s]+([0-9]{4,6})',
-                r'otp[:\s]+([0-9]{4,6})',
-                r'verification[:\s]+([0-9]{4,6})',
-                r'\b([0-9]{4,6})\b.*(?:passcode|code|otp|verify)',
-                r'<[^>]*>([0-9]{4,6})<[^>]*>',  # OTP in HTML tags
-                r'([0-9]{6})',  # Any 6-digit number as fallback
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, body, re.IGNORECASE)
-                if match:
-                    otp = match.group(1)
-                    if otp and len(otp) >= 4:  # OTP should be at least 4 digits
-                        logger.info(f"[OK] OTP extracted: {otp}")
-                        return otp
-            
-            logger.warning("Could not extract OTP from email body")
+            for part in parts:
+                body = part.get_payload(decode=True).decode('utf-8', errors='ignore')
+                otp = self._extract_otp_from_text(body)
+                if otp:
+                    return otp
             return None
             
         except Exception as e:
             logger.error(f"Error extracting OTP: {str(e)}")
             return None
+    
+    @staticmethod
+    def _extract_otp_from_text(body: str) -> Optional[str]:
+        """Extract OTP code from decoded email body text"""
+        logger.debug(f"Email body preview: {body[:200]}")
+        
+        # A code directly after a keyword is the common case; try it before the looser patterns
+        match = _OTP_KEYWORD_RE.search(body)
+        if match:
+            otp = match.group(1)
+            logger.info(f"[OK] OTP extracted: {otp}")
+            return otp
+        
+        for pattern in _OTP_PATTERNS:
+            match = pattern.search(body)
+            if match:
+                otp = match.group(1)
+                if otp and len(otp) >= 4:  # OTP should be at least 4 digits
+                    logger.info(f"[OK] OTP extracted: {otp}")
+                    return otp
+        
+        match = _OTP_FALLBACK_RE.search(body, 0, _OTP_SCAN_LIMIT)
+        if match:
+            otp = match.group(1)
+            logger.info(f"[OK] OTP extracted: {otp}")
+            return otp
+        
+        logger.warning("Could not extract OTP from email body")
+        return None
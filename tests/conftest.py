@@ -0,0 +1,130 @@
+"""
+Shared fixtures for the DPS Monitor test suite
+"""
+
+import asyncio
+import functools
+import os
+import sys
+from pathlib import Path
+from types import MappingProxyType
+from unittest.mock import AsyncMock
+
+import pytest
+import pytest_asyncio
+
+# The application modules import each other as top-level packages (db, utils, agent, ...)
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+
+def _playwright_browsers_installed():
+    """Whether `playwright install chromium` has been run, checked without starting Playwright"""
+    if os.environ.get('DPS_CDP_ENDPOINT'):
+        # Tests connect to an already running Chromium
+        return True
+    path = os.environ.get('PLAYWRIGHT_BROWSERS_PATH')
+    if path == '0':
+        # Browsers are installed inside the playwright package itself
+        return True
+    if path:
+        root = Path(path)
+    elif sys.platform == 'win32':
+        root = Path(os.environ.get('LOCALAPPDATA', '~')) / 'ms-playwright'
+    elif sys.platform == 'darwin':
+        root = Path('~/Library/Caches/ms-playwright')
+    else:
+        root = Path('~/.cache/ms-playwright')
+    return any(root.expanduser().glob('chromium*'))
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip tests that need the shared browser at collection time when Chromium isn't installed"""
+    if _playwright_browsers_installed():
+        return
+    skip = pytest.mark.skip(reason="Playwright browsers not installed (run `playwright install chromium`)")
+    for item in items:
+        if 'shared_browser' in getattr(item, 'fixturenames', ()):
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="session")
+def event_loop_policy():
+    """Run async tests on uvloop when it is installed, the stdlib loop otherwise"""
+    try:
+        import uvloop  # type: ignore
+    except ImportError:
+        return asyncio.DefaultEventLoopPolicy()
+    return uvloop.EventLoopPolicy()
+
+
+@pytest.fixture(scope="session")
+def checker_config():
+    """Read-only checker configuration shared by the suite; pass a dict() copy to the checker"""
+    return MappingProxyType({
+        'first_name': 'Test',
+        'last_name': 'User',
+        'dob': '01/01/2000',
+        'ssn_last4': '1234',
+        'phone': '(555) 123-4567',
+        'email': 'test@example.com',
+        'zip_code': '76201',
+        'notify_email': 'test@example.com',
+        'smtp_server': 'smtp.gmail.com',
+        'smtp_port': 587,
+        'smtp_user': 'test@gmail.com',
+        'smtp_password': 'test_password',
+        'location_preference': 'Denton',
+        'max_distance_miles': 20,
+        'headless': True,
+        'screenshot_on_error': False,
+    })
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def shared_browser():
+    """
+    Chromium shared by the session; tests open their own contexts in it.
+    
+    When DPS_CDP_ENDPOINT is set (e.g. http://localhost:9222 for a Chromium started with
+    --remote-debugging-port=9222) every xdist worker connects to that one browser instead
+    of launching its own.
+    """
+    from playwright.async_api import async_playwright
+    
+    playwright = await async_playwright().start()
+    cdp_endpoint = os.environ.get('DPS_CDP_ENDPOINT')
+    if cdp_endpoint:
+        browser = await playwright.chromium.connect_over_cdp(cdp_endpoint)
+    else:
+        browser = await playwright.chromium.launch(headless=True)
+    yield browser
+    await browser.close()
+    await playwright.stop()
+
+
+@pytest.fixture(scope="session")
+def playwright_mock_factory():
+    """Factory for mocks spec_set on a Playwright class ('Page', 'Locator', 'BrowserContext', ...)"""
+    from playwright import async_api
+    
+    def make(name):
+        # spec_set rejects attributes the real class lacks; coroutine methods become AsyncMocks
+        return AsyncMock(spec_set=getattr(async_api, name))
+    return make
+
+
+@pytest.fixture(scope="session")
+def page_mock_factory(playwright_mock_factory):
+    """Factory for Page mocks"""
+    return functools.partial(playwright_mock_factory, 'Page')
+
+
+@pytest.fixture
+def playwright_mock_tree(playwright_mock_factory):
+    """Playwright mock with chromium.launch -> new_context -> new_page wired to spec'd mocks"""
+    playwright = playwright_mock_factory('Playwright')
+    playwright.chromium = playwright_mock_factory('BrowserType')
+    browser = playwright.chromium.launch.return_value = playwright_mock_factory('Browser')
+    context = browser.new_context.return_value = playwright_mock_factory('BrowserContext')
+    context.new_page.return_value = playwright_mock_factory('Page')
+    return playwright
@@ -1,17 +1,20 @@
 import pytest
 from fastapi.testclient import TestClient
-import sys
-import os
-
-# Add src to path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
 
+from api import main, routes
 from api.main import app
+from db.database import Database
+from models.models import BookingResultResponse
 
-@pytest.fixture
-def client():
-    with TestClient(app) as client:
-        yield client
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    # One app lifespan (DB connect, scheduler start) for the whole module, on a throwaway
+    # database so test rows never reach data/dps_agent.db
+    db_path = tmp_path_factory.mktemp("db") / "dps_agent.db"
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(main, "db", Database(str(db_path)))
+        with TestClient(app) as client:
+            yield client
 
 def test_read_health(client):
     response = client.get("/api/health")
@@ -45,3 +48,49 @@ def test_analyze_endpoint(client):
     data = response.json()
     assert data["recommended_service"] == "Apply for first time Texas DL/Permit"
     assert data["confidence"] > 0.5
+
+def test_list_users_filters_private_fields(client):
+    user_data = {
+        "first_name": "List",
+        "last_name": "User",
+        "dob": "01/01/2000",
+        "ssn_last4": "1234",
+        "phone": "5551234567",
+        "email": "list@example.com",
+        "zip_code": "76201"
+    }
+    client.post("/api/users", json=user_data)
+    response = client.get("/api/users")
+    assert response.status_code == 200
+    users = response.json()
+    assert any(u["first_name"] == "List" for u in users)
+    assert all("ssn_last4" not in u and "smtp_password" not in u for u in users)
+
+def test_list_bookings_matches_response_model(client):
+    client.portal.call(routes.get_db().add_booking_result, {
+        "job_id": "bookings-test-job",
+        "location": "Denton",
+        "appointment_date": "03/02/2027",
+        "available_dates": ["03/02/2027", "03/09/2027"],
+        "total_slots": 2,
+    })
+    response = client.get("/api/bookings")
+    assert response.status_code == 200
+    booking = next(b for b in response.json() if b["job_id"] == "bookings-test-job")
+    assert booking["available_dates"] == ["03/02/2027", "03/09/2027"]
+    assert booking["booking_confirmed"] is False
+    assert list(booking) == list(BookingResultResponse.model_fields)
+
+    streamed = client.get("/api/bookings/stream")
+    assert streamed.status_code == 200
+    assert any(line.startswith('{"id"') and "bookings-test-job" in line
+               for line in streamed.text.splitlines())
+
+def test_job_logs_visible_after_flush(client):
+    db = routes.get_db()
+    job = client.portal.call(db.create_job, {"user_id": "logs-test-user", "service_type": "test"})
+    client.portal.call(db.add_log, job["id"], "queued entry")
+    client.portal.call(db.flush)
+    response = client.get(f"/api/jobs/{job['id']}/logs")
+    assert response.status_code == 200
+    assert [log["message"] for log in response.json()] == ["queued entry"]
@@ -4,50 +4,46 @@ Test suite for DPS Appointment Checker
 
 import pytest
 import asyncio
+import copy
+import json
 import os
-from unittest.mock import Mock, patch, AsyncMock
+from unittest.mock import Mock, MagicMock, patch, AsyncMock
 from datetime import datetime
-import sys
 
-# Add src to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from playwright.async_api import TimeoutError as PlaywrightTimeout
 
-from appointment_checker import DPSAppointmentChecker
+from appointment_checker import DPSAppointmentChecker, _LOGIN_FIELD_PATTERNS, _OTP_FIELD_SELECTORS, _env_config, main
+
+
+def no_element_handle(playwright_mock_factory):
+    """JSHandle for an evaluate_handle() call that found no element"""
+    handle = playwright_mock_factory('JSHandle')
+    handle.as_element = MagicMock(return_value=None)
+    return handle
 
 
 class TestDPSAppointmentChecker:
     """Test cases for DPSAppointmentChecker class"""
     
-    @pytest.fixture
-    def mock_config(self):
-        """Fixture providing mock configuration"""
-        return {
-            'first_name': 'Test',
-            'last_name': 'User',
-            'dob': '01/01/2000',
-            'ssn_last4': '1234',
-            'phone': '(555) 123-4567',
-            'email': 'test@example.com',
-            'zip_code': '76201',
-            'notify_email': 'test@example.com',
-            'smtp_server': 'smtp.gmail.com',
-            'smtp_port': 587,
-            'smtp_user': 'test@gmail.com',
-            'smtp_password': 'test_password',
-            'location_preference': 'Denton',
-            'max_distance_miles': 20,
-            'headless': True,
-            'screenshot_on_error': False,
-        }
+    @pytest.fixture(scope="module")
+    def _base_checker(self, checker_config):
+        """Checker constructed once per module; tests work on copies of it"""
+        return DPSAppointmentChecker(config=dict(checker_config))
     
     @pytest.fixture
-    def checker(self, mock_config):
+    def checker(self, _base_checker):
         """Fixture providing DPSAppointmentChecker instance"""
-        return DPSAppointmentChecker(config=mock_config)
+        checker = copy.copy(_base_checker)
+        # Tests mutate these, so each copy gets its own
+        checker.config = dict(_base_checker.config)
+        checker.otp_handler = copy.copy(_base_checker.otp_handler)
+        checker.notifier = copy.copy(_base_checker.notifier)
+        checker._io_tasks = set()
+        return checker
     
-    def test_initialization(self, checker, mock_config):
+    def test_initialization(self, checker, checker_config):
         """Test checker initializes with correct configuration"""
-        assert checker.config == mock_config
+        assert checker.config == checker_config
         assert checker.base_url == "https://www.txdpsscheduler.com"
         assert checker.browser is None
         assert checker.page is None
@@ -61,39 +57,68 @@ class TestDPSAppointmentChecker:
             'SSN_LAST4': '5678',
             'ZIP_CODE': '75001'
         }):
+            _env_config.cache_clear()
             checker = DPSAppointmentChecker()
             assert checker.config['first_name'] == 'John'
             assert checker.config['last_name'] == 'Doe'
             assert checker.config['dob'] == '05/15/1995'
             assert checker.config['ssn_last4'] == '5678'
             assert checker.config['zip_code'] == '75001'
+            
+            # Later checkers reuse the parsed config but get their own copy
+            other = DPSAppointmentChecker()
+            assert other.config == checker.config
+            assert other.config is not checker.config
+        _env_config.cache_clear()
     
-    @pytest.mark.asyncio
-    async def test_setup_browser(self, checker):
+    async def test_setup_browser(self, checker, playwright_mock_tree):
         """Test browser setup creates browser and page instances"""
         with patch('appointment_checker.async_playwright') as mock_playwright:
-            mock_playwright_instance = AsyncMock()
-            mock_playwright.return_value.start = AsyncMock(return_value=mock_playwright_instance)
+            mock_playwright.return_value.start = AsyncMock(return_value=playwright_mock_tree)
+            checker.otp_handler.connect = AsyncMock()
             
-            mock_browser = AsyncMock()
-            mock_playwright_instance.chromium.launch = AsyncMock(return_value=mock_browser)
+            await checker.setup_browser()
             
-            mock_context = AsyncMock()
-            mock_browser.new_context = AsyncMock(return_value=mock_context)
+            browser = playwright_mock_tree.chromium.launch.return_value
+            assert checker.browser is browser
+            assert checker.page is browser.new_context.return_value.new_page.return_value
+            mock_playwright.return_value.start.assert_called_once()
+            checker.otp_handler.connect.assert_called_once()
+    
+    async def test_setup_browser_over_cdp(self, checker, playwright_mock_tree, playwright_mock_factory):
+        """Test a CDP endpoint connects to the running browser instead of launching one"""
+        browser = playwright_mock_tree.chromium.connect_over_cdp.return_value = playwright_mock_factory('Browser')
+        browser.new_context.return_value.new_page.return_value = playwright_mock_factory('Page')
+        with patch('appointment_checker.async_playwright') as mock_playwright:
+            mock_playwright.return_value.start = AsyncMock(return_value=playwright_mock_tree)
+            checker.otp_handler.connect = AsyncMock()
             
-            mock_page = AsyncMock()
-            mock_context.new_page = AsyncMock(return_value=mock_page)
+            await checker.setup_browser(cdp_endpoint="http://localhost:9222")
             
-            await checker.setup_browser()
+            playwright_mock_tree.chromium.connect_over_cdp.assert_awaited_once_with("http://localhost:9222")
+            playwright_mock_tree.chromium.launch.assert_not_called()
+            assert checker.browser is browser
+    
+    async def test_setup_browser_relaunch_after_disconnect(self, checker, playwright_mock_tree, playwright_mock_factory):
+        """Test a disconnected injected browser is replaced by an owned one and the old driver is stopped"""
+        injected = playwright_mock_factory('Browser')
+        injected.is_connected = MagicMock(return_value=False)
+        old_playwright = playwright_mock_factory('Playwright')
+        checker._playwright = old_playwright
+        with patch('appointment_checker.async_playwright') as mock_playwright:
+            mock_playwright.return_value.start = AsyncMock(return_value=playwright_mock_tree)
+            checker.otp_handler.connect = AsyncMock()
             
-            assert checker.browser is not None
-            assert checker.page is not None
-            mock_playwright.return_value.start.assert_called_once()
+            await checker.setup_browser(browser=injected)
+            
+        old_playwright.stop.assert_awaited_once()
+        assert checker._playwright is playwright_mock_tree
+        assert checker.browser is playwright_mock_tree.chromium.launch.return_value
+        assert checker._external_browser is False
     
-    @pytest.mark.asyncio
-    async def test_navigate_to_scheduler_success(self, checker):
+    async def test_navigate_to_scheduler_success(self, checker, page_mock_factory):
         """Test successful navigation to scheduler"""
-        checker.page = AsyncMock()
+        checker.page = page_mock_factory()
         checker.page.goto = AsyncMock()
         checker.page.wait_for_selector = AsyncMock()
         checker.page.click = AsyncMock()
@@ -105,12 +130,9 @@ class TestDPSAppointmentChecker:
         checker.page.goto.assert_called_once()
         checker.page.click.assert_called_once_with("button:has-text('ENGLISH')")
     
-    @pytest.mark.asyncio
-    async def test_navigate_to_scheduler_timeout(self, checker):
+    async def test_navigate_to_scheduler_timeout(self, checker, page_mock_factory):
         """Test navigation timeout handling"""
-        from playwright.async_api import TimeoutError as PlaywrightTimeout
-        
-        checker.page = AsyncMock()
+        checker.page = page_mock_factory()
         checker.page.goto = AsyncMock(side_effect=PlaywrightTimeout("Timeout"))
         checker.config['screenshot_on_error'] = False
         
@@ -118,28 +140,77 @@ class TestDPSAppointmentChecker:
         
         assert result is False
     
-    @pytest.mark.asyncio
-    async def test_fill_login_form_success(self, checker):
+    async def test_fill_login_form_success(self, checker, page_mock_factory):
         """Test successful login form filling"""
-        checker.page = AsyncMock()
+        checker.page = page_mock_factory()
         checker.page.wait_for_selector = AsyncMock()
         checker.page.query_selector_all = AsyncMock(return_value=[])
         checker.page.query_selector = AsyncMock(return_value=None)
         checker.page.fill = AsyncMock()
         checker.page.click = AsyncMock()
         checker.page.wait_for_load_state = AsyncMock()
+        checker.page.get_by_role = MagicMock()
+        checker.page.get_by_role.return_value.first.count = AsyncMock(return_value=0)
+        checker.page.get_by_role.return_value.first.click = AsyncMock()
         checker._save_screenshot = AsyncMock()
+        checker._start_otp_listener = MagicMock()
         
         result = await checker.fill_login_form()
         
         assert result is True
+        checker.page.get_by_role.return_value.first.click.assert_called_once_with(
+            force=True, no_wait_after=True, timeout=5000
+        )
+        checker._start_otp_listener.assert_called_once()
+    
+    @pytest.mark.parametrize("haystack,expected", [
+        ("Last four of SSN  ", 'ssn_last4'),
+        ("Last Name  ", 'last_name'),
+        ("First Name  ", 'first_name'),
+        ("Date of Birth (mm/dd/yyyy)  ", 'dob'),
+    ])
+    def test_login_field_patterns(self, haystack, expected):
+        """Test login field matching does not depend on pattern order"""
+        matches = [key for pattern, key, _ in _LOGIN_FIELD_PATTERNS if pattern.search(haystack)]
+        assert matches == [expected]
+    
+    async def test_fill_labeled_fields_skips_matching_values(self, checker, page_mock_factory, playwright_mock_factory):
+        """Test fields are located by accessible name and only written when they differ"""
+        first_name = playwright_mock_factory('Locator')
+        first_name.count.return_value = 1
+        first_name.input_value.return_value = "John"
+        last_name = playwright_mock_factory('Locator')
+        last_name.count.return_value = 1
+        last_name.input_value.return_value = ""
+        
+        def get_by_role(role, name):
+            locator = playwright_mock_factory('Locator')
+            locator.first = first_name if name.pattern == "first" else last_name
+            return locator
+        
+        checker.page = page_mock_factory()
+        checker.page.get_by_role.side_effect = get_by_role
+        patterns = [p for p in _LOGIN_FIELD_PATTERNS if p[1] in ('first_name', 'last_name')]
+        
+        filled = await checker._fill_labeled_fields(patterns, {'first_name': 'John', 'last_name': 'Doe'})
+        
+        assert filled == 1
+        first_name.type.assert_not_called()
+        last_name.type.assert_called_once_with('Doe', delay=30)
     
-    @pytest.mark.asyncio
-    async def test_fill_login_form_missing_elements(self, checker):
+    @pytest.mark.parametrize("current,target,field_name,expected", [
+        ("John", "John", "First Name", True),
+        ("", "John", "First Name", False),
+        ("01011990", "01/01/1990", "Date of Birth", True),
+        ("01/01/1991", "01/01/1990", "Date of Birth", False),
+    ])
+    def test_field_matches(self, current, target, field_name, expected):
+        """Test fields already holding the target value are skipped"""
+        assert DPSAppointmentChecker._field_matches(current, target, field_name) is expected
+    
+    async def test_fill_login_form_missing_elements(self, checker, page_mock_factory):
         """Test login form handling when elements are missing"""
-        from playwright.async_api import TimeoutError as PlaywrightTimeout
-        
-        checker.page = AsyncMock()
+        checker.page = page_mock_factory()
         checker.page.wait_for_selector = AsyncMock(side_effect=PlaywrightTimeout("Element not found"))
         checker.config['screenshot_on_error'] = False
         
@@ -147,12 +218,12 @@ class TestDPSAppointmentChecker:
         
         assert result is False
     
-    @pytest.mark.asyncio
-    async def test_handle_otp_verification_required(self, checker):
+    async def test_handle_otp_verification_required(self, checker, page_mock_factory, playwright_mock_factory):
         """Test OTP verification detection when required"""
-        checker.page = AsyncMock()
+        checker.page = page_mock_factory()
         checker.page.url = "https://example.com"
         checker.page.query_selector_all = AsyncMock(return_value=[])
+        checker.page.evaluate_handle = AsyncMock(return_value=no_element_handle(playwright_mock_factory))
         checker.page.query_selector = AsyncMock(return_value=None)
         checker.page.wait_for_load_state = AsyncMock()
         checker._save_screenshot = AsyncMock()
@@ -161,12 +232,12 @@ class TestDPSAppointmentChecker:
         
         assert result is True
     
-    @pytest.mark.asyncio
-    async def test_handle_otp_verification_not_required(self, checker):
+    async def test_handle_otp_verification_not_required(self, checker, page_mock_factory, playwright_mock_factory):
         """Test OTP verification detection when not required"""
-        checker.page = AsyncMock()
+        checker.page = page_mock_factory()
         checker.page.url = "https://example.com"
         checker.page.query_selector_all = AsyncMock(return_value=[])
+        checker.page.evaluate_handle = AsyncMock(return_value=no_element_handle(playwright_mock_factory))
         checker.page.query_selector = AsyncMock(return_value=None)
         checker.page.wait_for_load_state = AsyncMock()
         checker._save_screenshot = AsyncMock()
@@ -175,39 +246,61 @@ class TestDPSAppointmentChecker:
         
         assert result is True
     
-    @pytest.mark.asyncio
-    async def test_select_appointment_type_success(self, checker):
-        """Test successful appointment type selection"""
-        checker.page = AsyncMock()
+    async def test_handle_otp_verification_uses_listener(self, checker, page_mock_factory, playwright_mock_factory):
+        """Test OTP is taken from the listener started at LOG ON"""
+        async def fake_listener():
+            return "123456"
         
-        # Create mock buttons
-        mock_new_appt_btn = AsyncMock()
-        mock_new_appt_btn.text_content = AsyncMock(return_value="New Appointment")
-        mock_new_appt_btn.click = AsyncMock()
+        otp_field = playwright_mock_factory('ElementHandle')
+        checker.page = page_mock_factory()
+        checker.page.url = "https://example.com"
+        checker.page.query_selector_all = AsyncMock(return_value=[])
+        handle = playwright_mock_factory('JSHandle')
+        handle.as_element = MagicMock(return_value=otp_field)
+        checker.page.evaluate_handle = AsyncMock(return_value=handle)
+        checker.page.query_selector = AsyncMock()
+        checker.page.wait_for_load_state = AsyncMock()
+        checker.page.get_by_role = MagicMock()
+        checker.page.get_by_role.return_value.first.click = AsyncMock()
+        checker._save_screenshot = AsyncMock()
+        checker._otp_task = asyncio.create_task(fake_listener())
         
-        mock_service_btn = AsyncMock()
-        mock_service_btn.text_content = AsyncMock(return_value="Apply for first time Texas DL")
-        mock_service_btn.click = AsyncMock()
+        result = await checker.handle_otp_verification()
         
-        # Return buttons on first call, then updated list on second call
-        checker.page.query_selector_all = AsyncMock(side_effect=[
-            [mock_new_appt_btn],
-            [mock_new_appt_btn, mock_service_btn]
-        ])
+        assert result is True
+        otp_field.type.assert_called_once_with("123456", delay=50)
+        # Specific selectors are tried in priority order; the generic text-input fallback is not needed
+        assert checker.page.evaluate_handle.call_args.args[1] == _OTP_FIELD_SELECTORS
+        checker.page.query_selector.assert_not_called()
+        checker.page.get_by_role.return_value.first.click.assert_called_once()
+        assert checker._otp_task is None
+        
+    async def test_select_appointment_type_success(self, checker, page_mock_factory):
+        """Test successful appointment type selection"""
+        checker.page = page_mock_factory()
+        
+        # Role locators resolve the New Appointment and service buttons
+        checker.page.get_by_role = MagicMock()
+        checker.page.get_by_role.return_value.first.click = AsyncMock()
         checker._save_screenshot = AsyncMock()
         
         result = await checker.select_appointment_type()
         
         assert result is True
+        assert checker.page.get_by_role.return_value.first.click.call_count == 2
     
-    @pytest.mark.asyncio
-    async def test_search_location_success(self, checker):
+    async def test_search_location_success(self, checker, page_mock_factory):
         """Test successful location search"""
-        checker.page = AsyncMock()
+        checker.page = page_mock_factory()
         checker.page.wait_for_selector = AsyncMock()
         checker.page.fill = AsyncMock()
         checker.page.click = AsyncMock()
         checker.page.wait_for_load_state = AsyncMock()
+        checker.page.get_by_role = MagicMock()
+        next_btn = checker.page.get_by_role.return_value.first
+        next_btn.count = AsyncMock(return_value=1)
+        next_btn.is_enabled = AsyncMock(return_value=True)
+        next_btn.click = AsyncMock()
         
         result = await checker.search_location()
         
@@ -216,11 +309,12 @@ class TestDPSAppointmentChecker:
             "input[placeholder='#####'], input[id*='zip']",
             '76201'
         )
+        next_btn.click.assert_called_once_with(timeout=5000)
+        checker.page.click.assert_not_called()
     
-    @pytest.mark.asyncio
-    async def test_get_available_appointments_found(self, checker):
+    async def test_get_available_appointments_found(self, checker, page_mock_factory):
         """Test getting available appointments when found"""
-        checker.page = AsyncMock()
+        checker.page = page_mock_factory()
         content = "Denton 03/15/2026 03/16/2026 03/17/2026"
         checker.page.content = AsyncMock(return_value=content)
         checker.page.query_selector = AsyncMock(return_value=None)
@@ -232,20 +326,93 @@ class TestDPSAppointmentChecker:
         # Result may be None if location pattern not found in content
         assert True
     
-    @pytest.mark.asyncio
-    async def test_get_available_appointments_not_found(self, checker):
+    async def test_get_available_appointments_from_api_response(self, checker, page_mock_factory):
+        """Test appointments are read from the captured availability JSON"""
+        checker.page = page_mock_factory()
+        checker._save_screenshot = AsyncMock()
+        checker._latest_availability = [
+            {'Name': 'Lewisville', 'NextAvailableDate': '03/15/2026'},
+            {'Name': 'Denton Mega Center', 'NextAvailableDate': '03/17/2026',
+             'Slots': [{'Date': '03/20/2026'}]},
+        ]
+        
+        result = await checker.get_available_appointments()
+        
+        # Only the preferred location's dates, labelled with its own name
+        assert result['location'] == 'Denton Mega Center'
+        assert result['next_available'] == '03/17/2026'
+        assert result['available_dates'] == ['03/17/2026', '03/20/2026']
+        checker.page.content.assert_not_called()
+    
+    def test_parse_availability_without_preferred_location(self, checker):
+        """Test the first location with dates is reported under its own name when the preference is absent"""
+        result = checker._parse_availability([
+            {'Name': 'Frisco', 'Slots': []},
+            {'Name': 'Lewisville', 'NextAvailableDate': '03/15/2026'},
+            {'Name': 'Garland', 'NextAvailableDate': '03/01/2026'},
+        ])
+        
+        assert result['location'] == 'Lewisville'
+        assert result['available_dates'] == ['03/15/2026']
+    
+    async def test_get_available_appointments_from_page_text(self, checker, page_mock_factory):
+        """Test dates are read from the visible page text without fetching the HTML"""
+        checker.page = page_mock_factory()
+        checker.page.wait_for_selector = AsyncMock()
+        checker.page.content = AsyncMock()
+        body = checker.page.locator.return_value
+        body.text_content = AsyncMock(return_value="Denton 03/17/2026 03/15/2026")
+        checker.page.eval_on_selector_all = AsyncMock(return_value=[])
+        
+        result = await checker.get_available_appointments()
+        
+        assert result['location'] == 'Denton'
+        assert result['available_dates'] == ['03/15/2026', '03/17/2026']
+        checker.page.content.assert_not_called()
+    
+    async def test_get_available_appointments_from_date_cards(self, checker, page_mock_factory):
+        """Test date cards are read in one batch and preferred over the page text"""
+        checker.page = page_mock_factory()
+        checker.page.wait_for_selector = AsyncMock()
+        checker.page.locator.return_value.text_content = AsyncMock(return_value="Denton 01/01/2027")
+        checker.page.eval_on_selector_all = AsyncMock(return_value=[
+            "Next Available Date 03/15/2026",
+            "Tuesday 03/17/2026",
+            "Monday 03/16/2026",
+            "Cancel",
+        ])
+        
+        result = await checker.get_available_appointments()
+        
+        assert result['available_dates'] == ['03/16/2026', '03/17/2026']
+        checker.page.eval_on_selector_all.assert_called_once()
+
+    async def test_get_available_appointments_no_appointments_message(self, checker, page_mock_factory):
+        """Test the no-appointments message short-circuits before scanning the page"""
+        checker.page = page_mock_factory()
+        checker.page.wait_for_selector = AsyncMock()
+        checker.page.locator.return_value.text_content = AsyncMock(
+            return_value="Denton 03/15/2026 - No appointments available at this time"
+        )
+        checker.page.eval_on_selector_all = AsyncMock(return_value=[])
+        
+        result = await checker.get_available_appointments()
+        
+        assert result is None
+        checker.page.eval_on_selector_all.assert_not_called()
+
+    async def test_get_available_appointments_not_found(self, checker, page_mock_factory):
         """Test getting appointments when location not found"""
-        checker.page = AsyncMock()
+        checker.page = page_mock_factory()
         checker.page.query_selector = AsyncMock(return_value=None)
         
         result = await checker.get_available_appointments()
         
         assert result is None
     
-    @pytest.mark.asyncio
-    async def test_save_screenshot(self, checker, tmp_path):
+    async def test_save_screenshot(self, checker, tmp_path, page_mock_factory):
         """Test screenshot saving functionality"""
-        checker.page = AsyncMock()
+        checker.page = page_mock_factory()
         checker.page.screenshot = AsyncMock()
         
         with patch('os.makedirs'):
@@ -253,7 +420,20 @@ class TestDPSAppointmentChecker:
         
         checker.page.screenshot.assert_called_once()
     
-    def test_save_results(self, checker, tmp_path):
+    async def test_debug_screenshot_only_when_enabled(self, checker):
+        """Test progress screenshots are skipped unless DEBUG_SCREENSHOTS is set"""
+        checker._save_screenshot = AsyncMock()
+        
+        checker._debug_screenshot('form_before_fill')
+        assert not checker._io_tasks
+        
+        checker.config['debug_screenshots'] = True
+        checker._debug_screenshot('form_before_fill')
+        await asyncio.gather(*checker._io_tasks)
+        
+        checker._save_screenshot.assert_called_once_with('form_before_fill')
+    
+    def test_save_results(self, checker, tmp_path, monkeypatch):
         """Test results saving to JSON file"""
         test_appointments = {
             'location': 'Denton',
@@ -263,25 +443,43 @@ class TestDPSAppointmentChecker:
             'checked_at': datetime.now().isoformat()
         }
         
-        with patch('os.makedirs'), \
-             patch('builtins.open', create=True) as mock_open:
-            checker._save_results(test_appointments)
-            mock_open.assert_called_once()
+        # Write for real under tmp_path; forget directories created relative to another cwd
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(DPSAppointmentChecker, '_dirs_created', set())
+        
+        checker._save_results(test_appointments)
+        
+        saved = list(tmp_path.glob('results/appointments_found_*.json'))
+        assert len(saved) == 1
+        assert json.loads(saved[0].read_text()) == test_appointments
     
-    @pytest.mark.asyncio
-    async def test_cleanup(self, checker):
+    async def test_cleanup(self, checker, page_mock_factory, playwright_mock_factory):
         """Test browser cleanup"""
-        checker.page = AsyncMock()
-        checker.browser = AsyncMock()
-        checker.page.close = AsyncMock()
-        checker.browser.close = AsyncMock()
+        page = checker.page = page_mock_factory()
+        browser = checker.browser = playwright_mock_factory('Browser')
         
         await checker.cleanup()
         
-        checker.page.close.assert_called_once()
-        checker.browser.close.assert_called_once()
+        page.close.assert_called_once()
+        browser.close.assert_called_once()
+        assert checker.page is None
+        assert checker.browser is None
+    
+    async def test_cleanup_keeps_browser_between_cycles(self, checker, page_mock_factory, playwright_mock_factory):
+        """Test only the context is closed while the checker is used as a context manager"""
+        page = checker.page = page_mock_factory()
+        context = checker.context = playwright_mock_factory('BrowserContext')
+        browser = checker.browser = playwright_mock_factory('Browser')
+        
+        async with checker:
+            await checker.cleanup()
+            page.close.assert_called_once()
+            context.close.assert_called_once()
+            browser.close.assert_not_called()
+            assert checker.browser is browser
+        
+        browser.close.assert_called_once()
     
-    @pytest.mark.asyncio
     async def test_check_appointments_full_flow_success(self, checker):
         """Test full appointment checking flow with successful result"""
         # Mock all the sub-methods
@@ -302,7 +500,7 @@ class TestDPSAppointmentChecker:
         checker.get_available_appointments = AsyncMock(return_value=mock_appointments)
         checker.notifier = AsyncMock()
         checker.notifier.send_notification = AsyncMock(return_value=True)
-        checker._save_results = AsyncMock()
+        checker._save_results = Mock()
         checker.cleanup = AsyncMock()
         
         result = await checker.check_appointments()
@@ -310,9 +508,9 @@ class TestDPSAppointmentChecker:
         assert result is not None
         assert result['location'] == 'Denton'
         checker.notifier.send_notification.assert_called_once()
+        await asyncio.gather(*checker._io_tasks)
         checker._save_results.assert_called_once()
     
-    @pytest.mark.asyncio
     async def test_check_appointments_full_flow_no_appointments(self, checker):
         """Test full appointment checking flow with no appointments found"""
         checker.setup_browser = AsyncMock()
@@ -328,7 +526,6 @@ class TestDPSAppointmentChecker:
         
         assert result is None
     
-    @pytest.mark.asyncio
     async def test_check_appointments_navigation_failure(self, checker):
         """Test appointment checking when navigation fails"""
         checker.setup_browser = AsyncMock()
@@ -338,92 +535,87 @@ class TestDPSAppointmentChecker:
         result = await checker.check_appointments()
         
         assert result is None
+    
+    async def test_main_repeats_checks_in_one_browser(self, checker_config):
+        """Test main() runs every check inside one kept-alive browser session until slots are found"""
+        found = {'location': 'Denton'}
+        seen_keep_browser = []
+        
+        async def fake_check(self):
+            seen_keep_browser.append(self._keep_browser)
+            return found if len(seen_keep_browser) == 2 else None
+        
+        with patch('appointment_checker._env_config', return_value={**checker_config, 'check_interval_minutes': 5}), \
+                patch.object(DPSAppointmentChecker, 'check_appointments', fake_check), \
+                patch.object(DPSAppointmentChecker, 'cleanup', AsyncMock()) as cleanup, \
+                patch('appointment_checker.asyncio.sleep', AsyncMock()) as sleep:
+            assert await main() == 0
+        
+        assert seen_keep_browser == [True, True]
+        sleep.assert_awaited_once_with(300)
+        cleanup.assert_awaited_once()
 
 
 class TestConfigurationValidation:
     """Test cases for configuration validation"""
     
-    def test_missing_required_env_vars(self):
+    # Variables read by _env_config
+    ENV_KEYS = (
+        'FIRST_NAME', 'LAST_NAME', 'DOB', 'SSN_LAST4', 'PHONE', 'EMAIL', 'ZIP_CODE',
+        'NOTIFY_EMAIL', 'SMTP_SERVER', 'SMTP_PORT', 'SMTP_USER', 'SMTP_PASSWORD',
+        'LOCATION_PREFERENCE', 'MAX_DISTANCE_MILES', 'HEADLESS', 'SCREENSHOT_ON_ERROR',
+        'DEBUG_SCREENSHOTS', 'CHECK_INTERVAL_MINUTES',
+    )
+    
+    @pytest.fixture
+    def empty_env(self, monkeypatch):
+        """Unset just the variables the checker reads, and re-parse them for this test only"""
+        for key in self.ENV_KEYS:
+            monkeypatch.delenv(key, raising=False)
+        _env_config.cache_clear()
+        yield
+        _env_config.cache_clear()
+    
+    def test_missing_required_env_vars(self, empty_env):
         """Test behavior with missing environment variables"""
-        with patch.dict(os.environ, {}, clear=True):
-            checker = DPSAppointmentChecker()
-            # Should initialize with empty strings, not fail
-            assert checker.config['first_name'] == ''
-            assert checker.config['last_name'] == ''
+        checker = DPSAppointmentChecker()
+        # Should initialize with empty strings, not fail
+        assert checker.config['first_name'] == ''
+        assert checker.config['last_name'] == ''
     
-    def test_default_values(self):
+    def test_default_values(self, empty_env):
         """Test default configuration values"""
-        with patch.dict(os.environ, {}, clear=True):
-            checker = DPSAppointmentChecker()
-            assert checker.config['zip_code'] == '76201'
-            assert checker.config['headless'] is True
-            assert checker.config['screenshot_on_error'] is True
-            assert checker.config['smtp_server'] == 'smtp.gmail.com'
-            assert checker.config['smtp_port'] == 587
+        checker = DPSAppointmentChecker()
+        assert checker.config['zip_code'] == '76201'
+        assert checker.config['headless'] is True
+        assert checker.config['screenshot_on_error'] is True
+        assert checker.config['smtp_server'] == 'smtp.gmail.com'
+        assert checker.config['smtp_port'] == 587
+        assert checker.config['check_interval_minutes'] == 0
 
 
 class TestIntegration:
-    """Integration tests (require actual browser)"""
+    """Integration tests (require actual browser; skipped when Chromium isn't installed)"""
     
-    @pytest.mark.integration
-    @pytest.mark.asyncio
-    async def test_real_browser_setup(self):
+    pytestmark = pytest.mark.integration
+    
+    async def test_real_browser_setup(self, shared_browser, checker_config):
         """Test actual browser setup (requires Playwright installed)"""
-        config = {
-            'first_name': 'Test',
-            'last_name': 'User',
-            'dob': '01/01/2000',
-            'ssn_last4': '1234',
-            'phone': '(555) 123-4567',
-            'email': 'test@example.com',
-            'zip_code': '76201',
-            'notify_email': 'test@example.com',
-            'smtp_server': 'smtp.gmail.com',
-            'smtp_port': 587,
-            'smtp_user': 'test@gmail.com',
-            'smtp_password': 'test_password',
-            'location_preference': 'Denton',
-            'max_distance_miles': 20,
-            'headless': True,
-            'screenshot_on_error': False,
-        }
-        
-        checker = DPSAppointmentChecker(config=config)
+        checker = DPSAppointmentChecker(config=dict(checker_config))
         
         try:
-            await checker.setup_browser()
+            await checker.setup_browser(browser=shared_browser)
             assert checker.browser is not None
             assert checker.page is not None
         finally:
             await checker.cleanup()
     
-    @pytest.mark.integration
-    @pytest.mark.asyncio
-    async def test_real_website_navigation(self):
+    async def test_real_website_navigation(self, shared_browser, checker_config):
         """Test navigation to actual DPS website (requires internet)"""
-        config = {
-            'first_name': 'Test',
-            'last_name': 'User',
-            'dob': '01/01/2000',
-            'ssn_last4': '1234',
-            'phone': '(555) 123-4567',
-            'email': 'test@example.com',
-            'zip_code': '76201',
-            'notify_email': 'test@example.com',
-            'smtp_server': 'smtp.gmail.com',
-            'smtp_port': 587,
-            'smtp_user': 'test@gmail.com',
-            'smtp_password': 'test_password',
-            'location_preference': 'Denton',
-            'max_distance_miles': 20,
-            'headless': True,
-            'screenshot_on_error': False,
-        }
-        
-        checker = DPSAppointmentChecker(config=config)
+        checker = DPSAppointmentChecker(config=dict(checker_config))
         
         try:
-            await checker.setup_browser()
+            await checker.setup_browser(browser=shared_browser)
             result = await checker.navigate_to_scheduler()
             # Should successfully navigate to the page
             assert result is True
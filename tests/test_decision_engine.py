@@ -1,58 +1,37 @@
 import pytest
-import sys
-import os
-
-# Add src to path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from datetime import date, timedelta
 
 from agent.decision_engine import DecisionEngine
 
-@pytest.fixture
+# Slot strings for today + N days, formatted once for the module
+_TODAY = date.today()
+_SLOTS = {n: (_TODAY + timedelta(days=n)).strftime("%m/%d/%Y") for n in (0, 1, 5)}
+
+@pytest.fixture(scope="session")
 def engine():
+    """Shared engine; tests only read from it and must not mutate it"""
     return DecisionEngine()
 
-def test_determine_service_first_time(engine):
-    profile = {"has_texas_license": False, "age": 25}
-    analysis = engine.analyze_profile(profile)
-    assert analysis["service_key"] == "first_time_dl"
-    assert analysis["recommended_service"] == "Apply for first time Texas DL/Permit"
-
-def test_determine_service_renew(engine):
-    profile = {"has_texas_license": True, "license_expired": True}
-    analysis = engine.analyze_profile(profile)
-    assert analysis["service_key"] == "renew_dl"
-
-def test_determine_service_replace(engine):
-    profile = {"has_texas_license": True, "license_lost_stolen": True}
-    analysis = engine.analyze_profile(profile)
-    assert analysis["service_key"] == "replace_dl"
-
-def test_determine_service_transfer(engine):
-    profile = {"has_out_of_state_license": True, "has_texas_license": False}
+@pytest.mark.parametrize("profile,key", [
+    ({"has_texas_license": False, "age": 25}, "first_time_dl"),
+    ({"has_texas_license": True, "license_expired": True}, "renew_dl"),
+    ({"has_texas_license": True, "license_lost_stolen": True}, "replace_dl"),
+    ({"has_out_of_state_license": True, "has_texas_license": False}, "transfer_oos"),
+    ({"age": 16, "has_texas_license": False}, "permit"),
+], ids=["first_time", "renew", "replace", "transfer", "permit_under_18"])
+def test_determine_service(engine, profile, key):
     analysis = engine.analyze_profile(profile)
-    assert analysis["service_key"] == "transfer_oos"
+    assert analysis["service_key"] == key
 
-def test_determine_service_permit_under_18(engine):
-    profile = {"age": 16, "has_texas_license": False}
-    analysis = engine.analyze_profile(profile)
-    assert analysis["service_key"] == "permit"
-
-def test_score_slot(engine):
-    from datetime import date, timedelta
-    today = date.today()
-    s_today = today.strftime("%m/%d/%Y")
-    s_tmrw = (today + timedelta(days=1)).strftime("%m/%d/%Y")
-    s_week = (today + timedelta(days=5)).strftime("%m/%d/%Y")
+def test_determine_service_label(engine):
+    analysis = engine.analyze_profile({"has_texas_license": False, "age": 25})
+    assert analysis["recommended_service"] == "Apply for first time Texas DL/Permit"
 
-    assert engine.score_slot(s_today) == 1.0
-    assert engine.score_slot(s_tmrw) >= 0.90
-    assert engine.score_slot(s_week) >= 0.60
+@pytest.mark.parametrize("offset,lo", [(0, 1.0), (1, 0.90), (5, 0.60)])
+def test_score_slot(engine, offset, lo):
+    assert lo <= engine.score_slot(_SLOTS[offset]) <= 1.0
 
 def test_score_slot_priority(engine):
-    from datetime import date, timedelta
-    today = date.today()
-    s_tmrw = (today + timedelta(days=1)).strftime("%m/%d/%Y")
-    
     # Priority same_day penalizes next_day
-    score = engine.score_slot(s_tmrw, priority="same_day")
+    score = engine.score_slot(_SLOTS[1], priority="same_day")
     assert score < 0.90
@@ -0,0 +1,52 @@
+"""
+Integration test verifying the IMAP email connection
+"""
+
+import os
+import functools
+import logging
+
+import pytest
+from dotenv import load_dotenv
+
+from utils.otp_handler import OTPHandler
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=1)
+def _load_credentials():
+    """Load .env once and return (email, password)"""
+    load_dotenv()
+    return os.getenv('EMAIL'), os.getenv('SMTP_PASSWORD')
+
+
+@pytest.mark.integration
+def test_email_connection():
+    """Test IMAP connection to Gmail"""
+    email, password = _load_credentials()
+
+    if not email or not password:
+        pytest.skip("EMAIL or SMTP_PASSWORD not configured in .env")
+
+    logger.info(f"Testing email connection for: {email}")
+
+    otp_handler = OTPHandler(
+        email_address=email,
+        smtp_password=password
+    )
+
+    mail = otp_handler._open_inbox()
+    try:
+        otp = otp_handler._fetch_latest_otp(mail)
+    finally:
+        otp_handler._logout(mail)
+
+    if otp:
+        logger.info(f"[SUCCESS] Latest OTP found: {otp}")
+    else:
+        logger.info("[INFO] No OTP found in latest email (this is normal if no OTP email exists yet)")
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-m", "integration"]))
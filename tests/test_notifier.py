@@ -2,31 +2,66 @@
 Test suite for Email Notifier
 """
 
+import asyncio
+import smtplib
+import threading
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from types import MappingProxyType
+from unittest.mock import Mock, patch
 from datetime import datetime
-import sys
-import os
 
-# Add src to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from utils.notifier import EmailNotifier, _PLAIN_TEMPLATE, _HTML_TEMPLATE
 
-from src.utils.notifier import EmailNotifier
 
+@pytest.fixture(scope="session")
+def smtp_config():
+    """Read-only SMTP configuration shared by the notifier tests"""
+    return MappingProxyType({
+        'smtp_server': 'smtp.gmail.com',
+        'smtp_port': 587,
+        'smtp_user': 'test@gmail.com',
+        'smtp_password': 'test_password',
+        'notify_email': 'recipient@example.com'
+    })
 
+
+class FakeSMTP:
+    """Stand-in for an smtplib.SMTP connection: just the methods the notifier calls, as plain Mocks"""
+    
+    def __init__(self):
+        self.esmtp_features = {}
+        self.starttls = Mock()
+        self.login = Mock()
+        self.noop = Mock(return_value=(250, b'OK'))
+        self.send_message = Mock()
+        self.send = Mock()
+        self.getreply = Mock()
+        self.rset = Mock()
+        self.quit = Mock()
+        self.close = Mock()
+
+
+@pytest.fixture
+def mock_smtp():
+    """Patched smtplib.SMTP whose connections are a single FakeSMTP"""
+    with patch('smtplib.SMTP', return_value=FakeSMTP()) as mock_smtp:
+        yield mock_smtp
+
+
+@pytest.fixture
+def mock_server(mock_smtp):
+    """The SMTP connection handed out by mock_smtp"""
+    return mock_smtp.return_value
+
+
+@pytest.mark.xdist_group(name='notifier')
 class TestEmailNotifier:
     """Test cases for EmailNotifier class"""
     
     @pytest.fixture
-    def mock_config(self):
-        """Fixture providing mock configuration"""
-        return {
-            'smtp_server': 'smtp.gmail.com',
-            'smtp_port': 587,
-            'smtp_user': 'test@gmail.com',
-            'smtp_password': 'test_password',
-            'notify_email': 'recipient@example.com'
-        }
+    def mock_config(self, smtp_config):
+        """Fixture providing mock configuration (a copy tests may modify)"""
+        return dict(smtp_config)
     
     @pytest.fixture
     def notifier(self, mock_config):
@@ -75,6 +110,38 @@ class TestEmailNotifier:
         assert '<li>03/15/2026</li>' in html_text
         assert 'OTP' in html_text  # Should mention OTP requirement
     
+    def test_create_email_body_matches_format(self, notifier, mock_appointments):
+        """Test compiled templates render exactly like str.format and are reused across calls"""
+        plain_template = notifier._template_cache['plain']
+        plain_text, html_text = notifier._create_email_body(mock_appointments)
+        notifier._create_email_body(mock_appointments)
+        
+        assert notifier._template_cache['plain'] is plain_template
+        dates = mock_appointments['available_dates']
+        context = {
+            'location': 'Denton',
+            'location_html': 'Denton',
+            'next_available': '03/15/2026',
+            'next_available_html': '03/15/2026',
+            'total_slots': 5,
+            'checked_at': '2026-01-28 12:00:00 PM',
+            'dates_text': "\n".join("  • " + date for date in dates),
+            'more_text': "",
+            'dates_html': "".join(f"<li>{date}</li>" for date in dates),
+            'more_html': "",
+        }
+        assert plain_text == _PLAIN_TEMPLATE.format_map(context)
+        assert html_text == _HTML_TEMPLATE.format_map(context)
+    
+    def test_create_email_body_cached(self, notifier, mock_appointments):
+        """Test identical appointments reuse the rendered bodies and new ones don't"""
+        first = notifier._create_email_body(mock_appointments)
+        
+        assert notifier._create_email_body(dict(mock_appointments)) is first
+        changed = notifier._create_email_body({**mock_appointments, 'total_slots': 6})
+        assert changed is not first
+        assert 'Total Slots Found: 6' in changed[0]
+    
     def test_create_email_body_with_many_dates(self, notifier):
         """Test email body creation with more than 10 dates"""
         appointments = {
@@ -92,28 +159,53 @@ class TestEmailNotifier:
         assert '03/24/2026' in plain_text
         assert '...' in plain_text  # Indicates more dates available
     
-    @pytest.mark.asyncio
-    async def test_send_notification_success(self, notifier, mock_appointments):
+    async def test_send_notification_success(self, notifier, mock_appointments, mock_server):
         """Test successful email notification sending"""
-        with patch('smtplib.SMTP') as mock_smtp:
-            mock_server = MagicMock()
-            mock_smtp.return_value.__enter__.return_value = mock_server
-            
+        result = await notifier.send_notification(
+            subject="Test Subject",
+            appointments=mock_appointments
+        )
+        
+        assert result is True
+        mock_server.starttls.assert_called_once()
+        mock_server.login.assert_called_once_with('test@gmail.com', 'test_password')
+        mock_server.send_message.assert_called_once()
+    
+    async def test_send_notification_ssl_port(self, mock_config, mock_appointments, mock_smtp):
+        """Test port 465 connects with implicit TLS and skips STARTTLS"""
+        notifier = EmailNotifier({**mock_config, 'smtp_port': 465})
+        server = FakeSMTP()
+        
+        with patch('smtplib.SMTP_SSL', return_value=server) as mock_smtp_ssl:
+            assert await notifier.send_notification("Test", mock_appointments) is True
+        
+        mock_smtp_ssl.assert_called_once_with('smtp.gmail.com', 465)
+        mock_smtp.assert_not_called()
+        server.starttls.assert_not_called()
+        server.login.assert_called_once_with('test@gmail.com', 'test_password')
+        server.send_message.assert_called_once()
+    
+    async def test_send_notification_missing_credentials(self, mock_config, mock_appointments):
+        """Test notification sending with missing SMTP credentials"""
+        mock_config['smtp_user'] = ''
+        notifier = EmailNotifier(mock_config)
+        
+        with patch.object(notifier, '_create_email_body') as create_body:
             result = await notifier.send_notification(
                 subject="Test Subject",
                 appointments=mock_appointments
             )
-            
-            assert result is True
-            mock_server.starttls.assert_called_once()
-            mock_server.login.assert_called_once_with('test@gmail.com', 'test_password')
-            mock_server.send_message.assert_called_once()
+        
+        assert result is False
+        # Rejected before any body is rendered
+        create_body.assert_not_called()
     
-    @pytest.mark.asyncio
-    async def test_send_notification_missing_credentials(self, mock_config, mock_appointments):
-        """Test notification sending with missing SMTP credentials"""
-        mock_config['smtp_user'] = ''
+    @pytest.mark.parametrize("notify_email", ['', 'not-an-address'], ids=["empty", "invalid"])
+    async def test_send_notification_missing_recipient(self, mock_config, mock_appointments, notify_email):
+        """Test notification sending with missing recipient email"""
+        mock_config['notify_email'] = notify_email
         notifier = EmailNotifier(mock_config)
+        assert notifier.recipients == []
         
         result = await notifier.send_notification(
             subject="Test Subject",
@@ -122,11 +214,9 @@ class TestEmailNotifier:
         
         assert result is False
     
-    @pytest.mark.asyncio
-    async def test_send_notification_missing_recipient(self, mock_config, mock_appointments):
-        """Test notification sending with missing recipient email"""
-        mock_config['notify_email'] = ''
-        notifier = EmailNotifier(mock_config)
+    async def test_send_notification_auth_failure(self, notifier, mock_appointments, mock_server):
+        """Test notification sending with authentication failure"""
+        mock_server.login.side_effect = smtplib.SMTPAuthenticationError(535, b'Authentication failed')
         
         result = await notifier.send_notification(
             subject="Test Subject",
@@ -135,110 +225,177 @@ class TestEmailNotifier:
         
         assert result is False
     
-    @pytest.mark.asyncio
-    async def test_send_notification_auth_failure(self, notifier, mock_appointments):
-        """Test notification sending with authentication failure"""
-        import smtplib
+    async def test_send_notification_smtp_exception(self, notifier, mock_appointments, mock_server):
+        """Test notification sending with general SMTP exception"""
+        mock_server.login.side_effect = smtplib.SMTPException("Connection failed")
         
-        with patch('smtplib.SMTP') as mock_smtp:
-            mock_server = MagicMock()
-            mock_server.login.side_effect = smtplib.SMTPAuthenticationError(535, b'Authentication failed')
-            mock_smtp.return_value.__enter__.return_value = mock_server
-            
-            result = await notifier.send_notification(
-                subject="Test Subject",
-                appointments=mock_appointments
-            )
-            
-            assert result is False
+        result = await notifier.send_notification(
+            subject="Test Subject",
+            appointments=mock_appointments
+        )
+        
+        assert result is False
     
-    @pytest.mark.asyncio
-    async def test_send_notification_smtp_exception(self, notifier, mock_appointments):
-        """Test notification sending with general SMTP exception"""
-        import smtplib
+    async def test_send_notification_reuses_encoded_parts(self, notifier, mock_appointments, mock_server):
+        """Test repeat notifications share the encoded body parts but get their own headers"""
+        await notifier.send_notification("First", mock_appointments)
+        await notifier.send_notification("Second", mock_appointments)
         
-        with patch('smtplib.SMTP') as mock_smtp:
-            mock_server = MagicMock()
-            mock_server.login.side_effect = smtplib.SMTPException("Connection failed")
-            mock_smtp.return_value.__enter__.return_value = mock_server
-            
-            result = await notifier.send_notification(
-                subject="Test Subject",
-                appointments=mock_appointments
-            )
-            
-            assert result is False
+        first, second = (c.args[0] for c in mock_server.send_message.call_args_list)
+        assert first is not second
+        assert (first['Subject'], second['Subject']) == ("First", "Second")
+        assert first.get_payload() == second.get_payload()
+        assert first.get_payload(0) is second.get_payload(0)
+        assert "Denton" in second.get_payload(1).get_payload(decode=True).decode()
     
-    @pytest.mark.asyncio
-    async def test_send_notification_with_custom_message(self, notifier, mock_appointments):
+    async def test_send_notification_with_custom_message(self, notifier, mock_appointments, mock_server):
         """Test notification sending with custom message"""
-        with patch('smtplib.SMTP') as mock_smtp:
-            mock_server = MagicMock()
-            mock_smtp.return_value.__enter__.return_value = mock_server
-            
-            custom_msg = "This is a custom message!"
-            result = await notifier.send_notification(
-                subject="Test Subject",
-                appointments=mock_appointments,
-                custom_message=custom_msg
-            )
-            
-            assert result is True
-            # Verify send_message was called (custom message is included internally)
-            mock_server.send_message.assert_called_once()
+        custom_msg = "This is a custom message!"
+        result = await notifier.send_notification(
+            subject="Test Subject",
+            appointments=mock_appointments,
+            custom_message=custom_msg
+        )
+        
+        assert result is True
+        # Verify send_message was called (custom message is included internally)
+        mock_server.send_message.assert_called_once()
     
-    @pytest.mark.asyncio
-    async def test_send_notification_high_priority(self, notifier, mock_appointments):
+    async def test_send_notification_high_priority(self, notifier, mock_appointments, mock_server):
         """Test that notifications are sent with high priority"""
-        with patch('smtplib.SMTP') as mock_smtp:
-            mock_server = MagicMock()
-            mock_smtp.return_value.__enter__.return_value = mock_server
-            
-            result = await notifier.send_notification(
-                subject="Test Subject",
-                appointments=mock_appointments
-            )
-            
-            assert result is True
-            # Verify X-Priority header is set
-            call_args = mock_server.send_message.call_args
-            msg = call_args[0][0]
-            assert msg['X-Priority'] == '1'
-    
-    def test_send_test_email(self, notifier):
+        result = await notifier.send_notification(
+            subject="Test Subject",
+            appointments=mock_appointments
+        )
+        
+        assert result is True
+        # Verify X-Priority header is set
+        call_args = mock_server.send_message.call_args
+        msg = call_args[0][0]
+        assert msg['X-Priority'] == '1'
+        assert msg['X-MSMail-Priority'] == 'High'
+        assert msg['Importance'] == 'high'
+    
+    async def test_send_notification_reuses_connection(self, notifier, mock_appointments, mock_smtp, mock_server):
+        """Test consecutive notifications share one SMTP session"""
+        assert await notifier.send_notification("First", mock_appointments) is True
+        assert await notifier.send_notification("Second", mock_appointments) is True
+        
+        mock_smtp.assert_called_once()
+        mock_server.starttls.assert_called_once()
+        mock_server.login.assert_called_once()
+        assert mock_server.noop.call_count == 1
+        assert mock_server.send_message.call_count == 2
+        
+        await notifier.aclose()
+        mock_server.quit.assert_called_once()
+    
+    async def test_send_notification_retires_connection_after_limit(self, notifier, mock_appointments, mock_smtp, mock_server, monkeypatch):
+        """Test a pooled session is quit and replaced once it has carried the message limit"""
+        monkeypatch.setattr('utils.notifier._SMTP_MAX_MESSAGES', 2)
+        
+        for subject in ("First", "Second", "Third"):
+            assert await notifier.send_notification(subject, mock_appointments) is True
+        
+        assert mock_smtp.call_count == 2
+        mock_server.quit.assert_called_once()
+        assert mock_server.send_message.call_count == 3
+    
+    async def test_concurrent_notifications_use_separate_connections(self, notifier, mock_appointments, mock_smtp, mock_server):
+        """Test concurrent notifications are sent in parallel over their own pooled sessions"""
+        # Each send waits for the other, so this only completes if both are in flight together
+        barrier = threading.Barrier(2, timeout=5)
+        mock_server.send_message.side_effect = lambda msg: barrier.wait()
+        
+        results = await asyncio.gather(
+            notifier.send_notification("First", mock_appointments),
+            notifier.send_notification("Second", mock_appointments),
+        )
+        
+        assert results == [True, True]
+        assert mock_smtp.call_count == 2
+    
+    def test_recipients_parsed_at_init(self, mock_config):
+        """Test display names are stripped and invalid entries dropped when the notifier is built"""
+        notifier = EmailNotifier({**mock_config, 'notify_email': '"Doe, Jane" <jane@example.com>, bogus, b@example.com'})
+        
+        assert notifier.recipients == ['jane@example.com', 'b@example.com']
+        assert notifier.notify_email == 'jane@example.com, b@example.com'
+    
+    @pytest.mark.parametrize("notify_email", [
+        "a@example.com, b@example.com,c@example.com",
+        ["a@example.com", "b@example.com", "c@example.com"],
+    ], ids=["comma_separated", "list"])
+    async def test_send_notification_multiple_recipients(self, mock_config, mock_appointments, notify_email, mock_smtp, mock_server):
+        """Test several recipients are reached with one message over one SMTP session"""
+        notifier = EmailNotifier({**mock_config, 'notify_email': notify_email})
+        assert await notifier.send_notification("Test", mock_appointments) is True
+        
+        mock_smtp.assert_called_once()
+        mock_server.starttls.assert_called_once()
+        mock_server.login.assert_called_once()
+        mock_server.send_message.assert_called_once()
+        msg = mock_server.send_message.call_args[0][0]
+        assert msg['To'] == "a@example.com, b@example.com, c@example.com"
+    
+    async def test_send_notification_pipelines_when_supported(self, notifier, mock_appointments, mock_server):
+        """Test the envelope goes out in one write when the server advertises PIPELINING"""
+        mock_server.esmtp_features = {'pipelining': ''}
+        mock_server.getreply.side_effect = [(250, b'OK'), (250, b'OK'), (354, b'Go'), (250, b'Queued')]
+        
+        assert await notifier.send_notification("Test", mock_appointments) is True
+        
+        mock_server.send_message.assert_not_called()
+        envelope, payload = (c.args[0] for c in mock_server.send.call_args_list)
+        assert envelope == "MAIL FROM:<test@gmail.com>\r\nRCPT TO:<recipient@example.com>\r\nDATA\r\n"
+        assert payload.endswith(b'\r\n.\r\n')
+        assert mock_server.getreply.call_count == 4
+    
+    async def test_send_notification_runs_off_event_loop(self, notifier, mock_appointments, mock_server):
+        """Test the blocking SMTP work runs on the notifier's worker threads"""
+        threads = []
+        mock_server.send_message.side_effect = lambda msg: threads.append(threading.current_thread().name)
+        
+        assert await notifier.send_notification("Test", mock_appointments) is True
+        
+        assert len(threads) == 1 and threads[0].startswith("smtp")
+    
+    def test_send_test_email(self, notifier, mock_server):
         """Test sending test email"""
-        with patch('smtplib.SMTP') as mock_smtp:
-            mock_server = MagicMock()
-            mock_smtp.return_value.__enter__.return_value = mock_server
-            
-            result = notifier.send_test_email()
-            
-            assert result is True
-            mock_server.send_message.assert_called_once()
-            
-            # Verify test email was created with proper structure
-            call_args = mock_server.send_message.call_args
-            msg = call_args[0][0]
-            assert 'Test' in msg['Subject'] or 'test' in msg['Subject'].lower()
-            # Check that it's a proper email message
-            assert msg['From'] is not None
-            assert msg['To'] is not None
+        result = notifier.send_test_email()
+        
+        assert result is True
+        mock_server.send_message.assert_called_once()
+        
+        # Verify test email was created with proper structure
+        call_args = mock_server.send_message.call_args
+        msg = call_args[0][0]
+        assert 'Test' in msg['Subject'] or 'test' in msg['Subject'].lower()
+        # Check that it's a proper email message
+        assert msg['From'] is not None
+        assert msg['To'] is not None
+
+    
+    def test_send_test_email_not_configured(self, mock_config, mock_smtp):
+        """Test the test email is skipped when SMTP is not configured"""
+        mock_config['smtp_password'] = ''
+        notifier = EmailNotifier(mock_config)
+        
+        assert notifier.send_test_email() is False
+        mock_smtp.assert_not_called()
 
 
+@pytest.mark.xdist_group(name='notifier')
 class TestEmailBodyFormatting:
     """Test cases for email body formatting"""
     
-    def test_html_escaping(self):
+    @pytest.fixture(scope="class")
+    def notifier(self, smtp_config):
+        """Notifier shared by the class; body rendering doesn't change its state"""
+        return EmailNotifier(dict(smtp_config))
+    
+    def test_html_escaping(self, notifier):
         """Test that special characters in appointments are properly escaped"""
-        config = {
-            'smtp_server': 'smtp.gmail.com',
-            'smtp_port': 587,
-            'smtp_user': 'test@gmail.com',
-            'smtp_password': 'test_password',
-            'notify_email': 'recipient@example.com'
-        }
-        notifier = EmailNotifier(config)
-        
         appointments = {
             'location': 'Location <with> special &characters',
             'next_available': '03/15/2026',
@@ -250,22 +407,15 @@ class TestEmailBodyFormatting:
         plain_text, html_text = notifier._create_email_body(appointments)
         
         # Should handle special characters without breaking HTML
-        assert 'Location' in html_text
+        assert 'Location &lt;with&gt; special &amp;characters' in html_text
+        assert '<with>' not in html_text
+        assert 'Location <with> special &characters' in plain_text
         # Basic check that HTML structure is intact
         assert '<html>' in html_text
         assert '</html>' in html_text
     
-    def test_date_formatting(self):
+    def test_date_formatting(self, notifier):
         """Test date formatting in email body"""
-        config = {
-            'smtp_server': 'smtp.gmail.com',
-            'smtp_port': 587,
-            'smtp_user': 'test@gmail.com',
-            'smtp_password': 'test_password',
-            'notify_email': 'recipient@example.com'
-        }
-        notifier = EmailNotifier(config)
-        
         checked_at = '2026-01-28T14:30:45'
         appointments = {
             'location': 'Denton',
@@ -280,17 +430,23 @@ class TestEmailBodyFormatting:
         # Check that date is formatted properly
         assert '2026-01-28' in plain_text or '01-28' in plain_text
     
-    def test_empty_dates_list(self):
-        """Test email body creation with empty dates list"""
-        config = {
-            'smtp_server': 'smtp.gmail.com',
-            'smtp_port': 587,
-            'smtp_user': 'test@gmail.com',
-            'smtp_password': 'test_password',
-            'notify_email': 'recipient@example.com'
+    def test_date_formatting_from_datetime(self, notifier):
+        """Test checked_at may be passed as a datetime"""
+        appointments = {
+            'location': 'Denton',
+            'next_available': '03/15/2026',
+            'available_dates': ['03/15/2026'],
+            'total_slots': 1,
+            'checked_at': datetime(2026, 1, 28, 14, 30, 45)
         }
-        notifier = EmailNotifier(config)
         
+        plain_text, html_text = notifier._create_email_body(appointments)
+        
+        assert 'Checked at: 2026-01-28 02:30:45 PM' in plain_text
+        assert 'Checked at: 2026-01-28 02:30:45 PM' in html_text
+    
+    def test_empty_dates_list(self, notifier):
+        """Test email body creation with empty dates list"""
         appointments = {
             'location': 'Denton',
             'next_available': '03/15/2026',
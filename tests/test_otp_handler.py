@@ -0,0 +1,143 @@
+"""
+Test suite for OTP Handler
+"""
+
+import socket
+import threading
+import time
+import pytest
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from unittest.mock import Mock
+
+from utils.otp_handler import OTPHandler
+
+
+@pytest.fixture
+def otp_handler():
+    """OTP handler that is never connected to a real IMAP server"""
+    return OTPHandler('test@gmail.com', 'test_password')
+
+
+def fake_mailbox(raw_message: bytes):
+    """IMAP connection whose UID SEARCH finds one unread message with the given raw bytes"""
+    mail = Mock()
+
+    def uid(command, *args):
+        if command == "SEARCH":
+            return "OK", [b"42"]
+        return "OK", [(b"42 (UID 42 BODY[] {%d}" % len(raw_message), raw_message), b")"]
+
+    mail.uid = Mock(side_effect=uid)
+    return mail
+
+
+class _PlainSocket(socket.socket):
+    """Unencrypted socket with the SSLSocket.pending() the IDLE loop calls"""
+    
+    def pending(self):
+        return 0
+
+
+class FakeIMAPConnection:
+    """Just the imaplib.IMAP4_SSL surface the IDLE loop uses, over one end of a socket pair"""
+    
+    def __init__(self, sock):
+        self.sock = sock
+        self.file = sock.makefile('rb')
+        self.tagged_commands = {}
+    
+    def _new_tag(self):
+        return b'A1'
+    
+    def send(self, data):
+        self.sock.sendall(data)
+    
+    def readline(self):
+        return self.file.readline()
+
+
+@pytest.fixture
+def imap_pair():
+    """(client connection, server socket) pair for driving the IDLE loop"""
+    client, server = socket.socketpair()
+    mail = FakeIMAPConnection(_PlainSocket(fileno=client.detach()))
+    yield mail, server
+    mail.file.close()
+    mail.sock.close()
+    server.close()
+
+
+class TestOTPHandler:
+    """Test cases for OTPHandler"""
+
+    def test_fetch_latest_otp_base64_html(self, otp_handler):
+        """Test OTP is found in a base64-encoded HTML part"""
+        msg = MIMEMultipart('alternative')
+        msg.attach(MIMEText('<html><body><p>Your passcode is <b>482913</b></p></body></html>', 'html', 'utf-8'))
+        raw = msg.as_bytes()
+        assert b'482913' not in raw
+
+        mail = fake_mailbox(raw)
+
+        assert otp_handler._fetch_latest_otp(mail) == '482913'
+        fetch_call = mail.uid.call_args_list[-1]
+        assert fetch_call.args == ("FETCH", b"42", "(BODY.PEEK[])")
+
+    def test_fetch_latest_otp_ignores_boundary_digits(self, otp_handler):
+        """Test digits in a multipart boundary are not mistaken for the OTP"""
+        msg = MIMEMultipart('alternative', boundary='===============123456789012==')
+        msg.attach(MIMEText('Your passcode: 7351', 'plain', 'utf-8'))
+
+        assert otp_handler._fetch_latest_otp(fake_mailbox(msg.as_bytes())) == '7351'
+
+    def test_fetch_latest_otp_past_first_4kb_of_html_part(self, otp_handler):
+        """Test the whole decoded part reaches the OTP patterns, not just its first bytes"""
+        css = "".join(f".rule-{i} {{ color: #333333; }}\n" for i in range(200))
+        msg = MIMEMultipart('alternative')
+        msg.attach(MIMEText(f'<style>{css}</style><p>Your passcode: 908172</p>', 'html', 'utf-8'))
+
+        assert otp_handler._fetch_latest_otp(fake_mailbox(msg.as_bytes())) == '908172'
+
+    def test_fetch_otp_from_range_leaves_messages_unread(self, otp_handler):
+        """Test the IDLE path peeks at new messages so the UNSEEN polling fallback still sees them"""
+        msg = MIMEText('Your passcode: 135790', 'plain', 'utf-8')
+        mail = Mock()
+        mail.fetch = Mock(return_value=("OK", [(b"3 (BODY[] {0}", msg.as_bytes()), b")"]))
+
+        assert otp_handler._fetch_otp_from_range(mail, 2, 3) == '135790'
+        mail.fetch.assert_called_once_with("3", "(BODY.PEEK[])")
+
+    def test_extract_otp_skips_digits_near_keyword(self):
+        """Test six-digit numbers merely near a keyword do not beat the labelled passcode"""
+        body = (
+            '<style>.code { color: #333333; }</style>'
+            '<p>Scan the barcode 123456 at the counter.</p>'
+            '<p>Your passcode: 908172</p>'
+        )
+
+        assert OTPHandler._extract_otp_from_text(body) == '908172'
+
+    def test_extract_otp_after_long_style_block(self):
+        """Test a passcode past the first 4 KB still beats a CSS colour near the top"""
+        css = "".join(f".rule-{i} {{\n    color: #333333;\n    margin: 0 auto;\n}}\n" for i in range(120))
+        body = f"<html><head><style>\n{css}</style></head><body><p>Your passcode: 908172</p></body></html>"
+        assert body.index("908172") > 4096
+
+        assert OTPHandler._extract_otp_from_text(body) == '908172'
+
+    def test_extract_otp_passcode_is(self):
+        """Test the 'passcode is NNNNNN' wording is picked up by the fast path"""
+        assert OTPHandler._extract_otp_from_text('Your DPS passcode is 246810.') == '246810'
+
+    def test_idle_once_reads_already_buffered_exists(self, otp_handler, imap_pair):
+        """Test an EXISTS line buffered together with the IDLE continuation is seen without waiting"""
+        mail, server = imap_pair
+        # Arrives in one segment, so readline() of the "+" line buffers the rest
+        server.sendall(b"+ idling\r\n* 3 EXISTS\r\nA1 OK IDLE terminated\r\n")
+        
+        start = time.monotonic()
+        count = otp_handler._idle_once(mail, 5, threading.Event())
+        
+        assert count == 3
+        assert time.monotonic() - start < 1
@@ -0,0 +1,48 @@
+"""
+Test suite for Agent Scheduler
+"""
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from agent.scheduler import AgentScheduler
+
+
+@pytest.fixture
+def scheduler():
+    """Scheduler that is never started and has no database"""
+    return AgentScheduler(db=None)
+
+
+@pytest.fixture
+def mock_notifier():
+    """Patched EmailNotifier whose instances can be closed"""
+    with patch('agent.scheduler.EmailNotifier') as notifier_cls:
+        notifier_cls.return_value.aclose = AsyncMock()
+        yield notifier_cls.return_value
+
+
+class TestNotifierPruning:
+    """Test cases for releasing notifiers of finished jobs"""
+
+    CONFIG = {'smtp_server': 'smtp.gmail.com', 'smtp_port': 587, 'notify_email': 'user@example.com'}
+
+    async def test_release_keeps_notifier_shared_with_running_job(self, scheduler, mock_notifier):
+        """Test a notifier stays open while another job with the same key still uses it"""
+        scheduler._get_notifier('job-1', self.CONFIG)
+        scheduler._get_notifier('job-2', self.CONFIG)
+
+        await scheduler._release_notifier('job-1')
+
+        assert len(scheduler._notifiers) == 1
+        mock_notifier.aclose.assert_not_awaited()
+
+    async def test_release_closes_notifier_of_last_job(self, scheduler, mock_notifier):
+        """Test the notifier is dropped and closed once its last job finishes"""
+        scheduler._get_notifier('job-1', self.CONFIG)
+
+        await scheduler._release_notifier('job-1')
+        await scheduler._release_notifier('job-1')
+
+        assert scheduler._notifiers == {}
+        mock_notifier.aclose.assert_awaited_once()